@@ -0,0 +1,30 @@
+"""add forecast snapshot data version
+
+Revision ID: a1c7e3f9b520
+Revises: d2f6b8a4c1e7
+Create Date: 2026-10-17 19:40:27.905163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c7e3f9b520'
+down_revision: Union[str, Sequence[str], None] = 'd2f6b8a4c1e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing snapshots get 0, so any shop that has synced since they
+    # were computed recomputes its report live until the next refresh
+    op.add_column('forecast_snapshots', sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('forecast_snapshots', 'data_version')
@@ -0,0 +1,32 @@
+"""add sales line item id
+
+Revision ID: a7d3f9c2e158
+Revises: f0c4e8a1b6d2
+Create Date: 2026-10-17 15:48:12.390247
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3f9c2e158'
+down_revision: Union[str, Sequence[str], None] = 'f0c4e8a1b6d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows keep a NULL line item id (NULLs never conflict) and are
+    # replaced by keyed rows on the next sync of their orders
+    op.add_column('sales', sa.Column('line_item_id', sa.BigInteger(), nullable=True))
+    op.create_unique_constraint('uq_sales_order_line_item', 'sales', ['shop_id', 'order_id', 'line_item_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_sales_order_line_item', 'sales', type_='unique')
+    op.drop_column('sales', 'line_item_id')
@@ -0,0 +1,91 @@
+"""partition sales by month
+
+Revision ID: b4e8d2a6f173
+Revises: a7d3f9c2e158
+Create Date: 2026-10-17 16:34:51.207719
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8d2a6f173'
+down_revision: Union[str, Sequence[str], None] = 'a7d3f9c2e158'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = 'id, shop_id, variant_id, order_id, line_item_id, title, variant_title, sku, quantity_sold, created_at'
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _columns() -> list:
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('shop_id', sa.UUID(), nullable=False),
+        sa.Column('variant_id', sa.BigInteger(), nullable=False),
+        sa.Column('order_id', sa.BigInteger(), nullable=True),
+        sa.Column('line_item_id', sa.BigInteger(), nullable=True),
+        sa.Column('title', sa.String(length=200), nullable=True),
+        sa.Column('variant_title', sa.String(length=100), nullable=True),
+        sa.Column('sku', sa.String(length=50), nullable=True),
+        sa.Column('quantity_sold', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.Date(), nullable=False),
+    ]
+
+
+def _create_sales_indexes() -> None:
+    op.create_foreign_key('sales_shop_id_fkey', 'sales', 'shops', ['shop_id'], ['id'])
+    op.create_index('ix_sales_created_at', 'sales', ['created_at'], unique=False)
+    op.create_index('idx_sales_shop_variant_date', 'sales', ['shop_id', 'variant_id', 'created_at'], unique=False, postgresql_include=['quantity_sold'])
+    op.create_index('idx_sales_shop_order', 'sales', ['shop_id', 'order_id'], unique=False)
+    op.create_index('idx_sales_shop_date', 'sales', ['shop_id', 'created_at'], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sales_partitioned', *_columns(), postgresql_partition_by='RANGE (created_at)')
+
+    # One partition per month that has rows, through a few months ahead;
+    # services/sales_partitions.py keeps them rolling from here on
+    first, last = op.get_bind().execute(sa.text('SELECT min(created_at), max(created_at) FROM sales')).one()
+    current = date.today().replace(day=1)
+    month = (first or current).replace(day=1)
+    end = _add_months(max(last or current, current).replace(day=1), MONTHS_AHEAD)
+
+    while month <= end:
+        op.execute(
+            f"CREATE TABLE sales_y{month.year:04d}m{month.month:02d} PARTITION OF sales_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+    # Copied before any index exists, then indexed once
+    op.execute(f'INSERT INTO sales_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM sales')
+    op.drop_table('sales')
+    op.rename_table('sales_partitioned', 'sales')
+
+    op.create_primary_key('sales_pkey', 'sales', ['id', 'created_at'])
+    op.create_unique_constraint('uq_sales_order_line_item', 'sales', ['shop_id', 'order_id', 'line_item_id', 'created_at'])
+    _create_sales_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('sales_unpartitioned', *_columns())
+    op.execute(f'INSERT INTO sales_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM sales')
+    # Drops every attached partition with it
+    op.drop_table('sales')
+    op.rename_table('sales_unpartitioned', 'sales')
+
+    op.create_primary_key('sales_pkey', 'sales', ['id'])
+    op.create_unique_constraint('uq_sales_order_line_item', 'sales', ['shop_id', 'order_id', 'line_item_id'])
+    _create_sales_indexes()
@@ -0,0 +1,42 @@
+"""add sync states and sales order id
+
+Revision ID: c3a9e1f4b2d7
+Revises: 9fdedd4141f6
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a9e1f4b2d7'
+down_revision: Union[str, Sequence[str], None] = '9fdedd4141f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sync_states',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('shop_id', sa.UUID(), nullable=False),
+    sa.Column('resource', sa.String(length=20), nullable=False),
+    sa.Column('watermark', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('window_start', sa.Date(), nullable=True),
+    sa.Column('synced_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['shop_id'], ['shops.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('shop_id', 'resource', name='uq_sync_state_shop_resource')
+    )
+    op.add_column('sales', sa.Column('order_id', sa.BigInteger(), nullable=True))
+    op.create_index('idx_sales_shop_order', 'sales', ['shop_id', 'order_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_sales_shop_order', table_name='sales')
+    op.drop_column('sales', 'order_id')
+    op.drop_table('sync_states')
@@ -0,0 +1,28 @@
+"""add shop data version
+
+Revision ID: c9a1e5f7d304
+Revises: b4e8d2a6f173
+Create Date: 2026-10-17 17:52:09.481306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9a1e5f7d304'
+down_revision: Union[str, Sequence[str], None] = 'b4e8d2a6f173'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('shops', sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('shops', 'data_version')
@@ -0,0 +1,30 @@
+"""add sales default partition
+
+Revision ID: d2f6b8a4c1e7
+Revises: c9a1e5f7d304
+Create Date: 2026-10-17 19:12:40.318552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6b8a4c1e7'
+down_revision: Union[str, Sequence[str], None] = 'c9a1e5f7d304'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Catches rows for a month whose partition does not exist yet;
+    # services/sales_partitions.py moves them out when it creates one
+    op.execute('CREATE TABLE sales_default PARTITION OF sales DEFAULT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sales_default')
@@ -0,0 +1,41 @@
+"""add sales daily rollup
+
+Revision ID: d81f5a2c6e94
+Revises: c3a9e1f4b2d7
+Create Date: 2026-10-17 11:40:22.508113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f5a2c6e94'
+down_revision: Union[str, Sequence[str], None] = 'c3a9e1f4b2d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sales_daily',
+    sa.Column('shop_id', sa.UUID(), nullable=False),
+    sa.Column('variant_id', sa.BigInteger(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('quantity_sold', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['shop_id'], ['shops.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('shop_id', 'variant_id', 'day')
+    )
+    op.execute("""
+        INSERT INTO sales_daily (shop_id, variant_id, day, quantity_sold)
+        SELECT shop_id, variant_id, created_at, SUM(quantity_sold)
+        FROM sales
+        GROUP BY shop_id, variant_id, created_at
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sales_daily')
@@ -0,0 +1,39 @@
+"""add forecast snapshots
+
+Revision ID: e5b2c7d9a013
+Revises: d81f5a2c6e94
+Create Date: 2026-10-17 12:58:07.114902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2c7d9a013'
+down_revision: Union[str, Sequence[str], None] = 'd81f5a2c6e94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('forecast_snapshots',
+    sa.Column('shop_id', sa.UUID(), nullable=False),
+    sa.Column('restock_days', sa.Integer(), nullable=False),
+    sa.Column('minimum_value', sa.Integer(), nullable=False),
+    sa.Column('sales_duration', sa.Integer(), nullable=False),
+    sa.Column('location_ids', postgresql.ARRAY(sa.BigInteger()), nullable=False),
+    sa.Column('rows', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['shop_id'], ['shops.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('shop_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('forecast_snapshots')
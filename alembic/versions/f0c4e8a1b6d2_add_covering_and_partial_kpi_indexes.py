@@ -0,0 +1,43 @@
+"""add covering and partial kpi indexes
+
+Revision ID: f0c4e8a1b6d2
+Revises: e5b2c7d9a013
+Create Date: 2026-10-17 14:21:36.730518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f0c4e8a1b6d2'
+down_revision: Union[str, Sequence[str], None] = 'e5b2c7d9a013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently so syncs keep writing while the indexes build
+    with op.get_context().autocommit_block():
+        op.create_index('idx_inventory_shop_sku_kpi', 'inventory', ['shop_id', 'sku'], unique=False, postgresql_include=['inventory', 'price'], postgresql_where=sa.text("sku IS NOT NULL AND sku <> ''"), postgresql_concurrently=True)
+        op.create_index('idx_sales_shop_date', 'sales', ['shop_id', 'created_at'], unique=False, postgresql_concurrently=True)
+        op.create_index('idx_sales_shop_variant_date_qty', 'sales', ['shop_id', 'variant_id', 'created_at'], unique=False, postgresql_include=['quantity_sold'], postgresql_concurrently=True)
+        op.drop_index('idx_sales_shop_variant_date', table_name='sales', postgresql_concurrently=True)
+        op.execute('ALTER INDEX idx_sales_shop_variant_date_qty RENAME TO idx_sales_shop_variant_date')
+        op.create_index('idx_sales_daily_shop_day', 'sales_daily', ['shop_id', 'day'], unique=False, postgresql_include=['quantity_sold'], postgresql_concurrently=True)
+        op.create_index('idx_sales_daily_shop_variant', 'sales_daily', ['shop_id', 'variant_id'], unique=False, postgresql_include=['quantity_sold'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_sales_daily_shop_variant', table_name='sales_daily', postgresql_concurrently=True)
+        op.drop_index('idx_sales_daily_shop_day', table_name='sales_daily', postgresql_concurrently=True)
+        op.create_index('idx_sales_shop_variant_date_plain', 'sales', ['shop_id', 'variant_id', 'created_at'], unique=False, postgresql_concurrently=True)
+        op.drop_index('idx_sales_shop_variant_date', table_name='sales', postgresql_concurrently=True)
+        op.execute('ALTER INDEX idx_sales_shop_variant_date_plain RENAME TO idx_sales_shop_variant_date')
+        op.drop_index('idx_sales_shop_date', table_name='sales', postgresql_concurrently=True)
+        op.drop_index('idx_inventory_shop_sku_kpi', table_name='inventory', postgresql_concurrently=True)
@@ -3,13 +3,16 @@ import hmac
 import re
 import secrets
 from datetime import datetime, timedelta, timezone
-import requests
+import httpx
 from urllib.parse import urlencode
 
 from fastapi import APIRouter, Request, HTTPException, Depends, status
 from fastapi.responses import RedirectResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from core import shopify_client
 from core.session_token import get_session_shop_domain, verify_shopify_session_token
 from core.config import (
     BACKEND_PUBLIC_URL,
@@ -84,7 +87,7 @@ def _expiry_datetime_from_seconds(seconds: int | None) -> datetime | None:
 
 
 def exchange_oauth_code_for_token(shop: str, code: str) -> dict:
-    token_response = requests.post(
+    token_response = shopify_client.post(
         f"https://{shop}/admin/oauth/access_token",
         data={
             "client_id": SHOPIFY_API_KEY,
@@ -92,14 +95,27 @@ def exchange_oauth_code_for_token(shop: str, code: str) -> dict:
             "code": code,
             "expiring" : 1
         },
-        timeout=30,
     )
     token_response.raise_for_status()
     return token_response.json()
 
 
 def refresh_shopify_access_token(shop: str, refresh_token: str) -> dict:
-    token_response = requests.post(
+    token_response = shopify_client.post(
+        f"https://{shop}/admin/oauth/access_token",
+        data={
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+            "client_id": SHOPIFY_API_KEY,
+            "client_secret": SHOPIFY_API_SECRET,
+        },
+    )
+    token_response.raise_for_status()
+    return token_response.json()
+
+
+async def arefresh_shopify_access_token(shop: str, refresh_token: str) -> dict:
+    token_response = await shopify_client.apost(
         f"https://{shop}/admin/oauth/access_token",
         data={
             "grant_type": "refresh_token",
@@ -107,7 +123,6 @@ def refresh_shopify_access_token(shop: str, refresh_token: str) -> dict:
             "client_id": SHOPIFY_API_KEY,
             "client_secret": SHOPIFY_API_SECRET,
         },
-        timeout=30,
     )
     token_response.raise_for_status()
     return token_response.json()
@@ -125,13 +140,12 @@ def save_shop_token_payload(store: Shop, token_payload: dict) -> None:
 
 
 def get_granted_shopify_scopes(shop: str, access_token: str) -> set[str]:
-    response = requests.get(
+    response = shopify_client.get(
         f"https://{shop}/admin/oauth/access_scopes.json",
         headers={
             "X-Shopify-Access-Token": access_token,
             "Content-Type": "application/json",
         },
-        timeout=30,
     )
     response.raise_for_status()
 
@@ -157,7 +171,7 @@ def ensure_shopify_scopes(
 ) -> None:
     try:
         granted_scopes = get_granted_shopify_scopes(shop, access_token)
-    except requests.RequestException as exc:
+    except httpx.HTTPError as exc:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail={
@@ -181,14 +195,8 @@ def ensure_shopify_scopes(
         )
 
 
-def get_valid_shopify_access_token(
-    db: Session,
-    shop_domain: str,
-    required_scopes: tuple[str, ...] = (),
-    host: str | None = None,
-) -> str:
-    shop = db.query(Shop).filter(Shop.shop_domain == validate_shop_domain(shop_domain)).first()
-
+def _access_token_needs_refresh(shop: Shop | None) -> bool:
+    """Validate the stored tokens; True when the access token must be refreshed first."""
     if not shop:
         raise HTTPException(status_code=404, detail="Shop not found")
 
@@ -196,9 +204,7 @@ def get_valid_shopify_access_token(
         raise HTTPException(status_code=401, detail="Shopify access token missing")
 
     if not shop.access_token_expires_at:
-        if required_scopes:
-            ensure_shopify_scopes(shop.shop_domain, shop.access_token, required_scopes, host)
-        return shop.access_token
+        return False
 
     now = datetime.now(timezone.utc)
     expires_at = shop.access_token_expires_at
@@ -206,7 +212,7 @@ def get_valid_shopify_access_token(
         expires_at = expires_at.replace(tzinfo=timezone.utc)
 
     if expires_at - timedelta(seconds=TOKEN_REFRESH_BUFFER_SECONDS) > now:
-        return shop.access_token
+        return False
 
     if not shop.refresh_token:
         raise HTTPException(status_code=401, detail="Shopify refresh token missing")
@@ -218,6 +224,22 @@ def get_valid_shopify_access_token(
         if refresh_expires_at <= now:
             raise HTTPException(status_code=401, detail="Shopify refresh token expired")
 
+    return True
+
+
+def get_valid_shopify_access_token(
+    db: Session,
+    shop_domain: str,
+    required_scopes: tuple[str, ...] = (),
+    host: str | None = None,
+) -> str:
+    shop = db.query(Shop).filter(Shop.shop_domain == validate_shop_domain(shop_domain)).first()
+
+    if not _access_token_needs_refresh(shop):
+        if required_scopes and not shop.access_token_expires_at:
+            ensure_shopify_scopes(shop.shop_domain, shop.access_token, required_scopes, host)
+        return shop.access_token
+
     refreshed_payload = refresh_shopify_access_token(shop.shop_domain, shop.refresh_token)
     save_shop_token_payload(shop, refreshed_payload)
     db.commit()
@@ -227,6 +249,22 @@ def get_valid_shopify_access_token(
     return shop.access_token
 
 
+async def aget_valid_shopify_access_token(db: AsyncSession, shop_domain: str) -> str:
+    """get_valid_shopify_access_token for async endpoints (no scope check)."""
+    result = await db.execute(
+        select(Shop).where(Shop.shop_domain == validate_shop_domain(shop_domain))
+    )
+    shop = result.scalars().first()
+
+    if not _access_token_needs_refresh(shop):
+        return shop.access_token
+
+    refreshed_payload = await arefresh_shopify_access_token(shop.shop_domain, shop.refresh_token)
+    save_shop_token_payload(shop, refreshed_payload)
+    await db.commit()
+    return shop.access_token
+
+
 def _request_host(request: Request) -> str | None:
     return (
         request.headers.get("X-Shopify-Host")
@@ -296,14 +334,13 @@ def register_webhook_graphql(shop: str, access_token: str, topic: str, callback_
 
     print(f"[WEBHOOK] Registering {topic}")
 
-    resp = requests.post(
+    resp = shopify_client.post(
         endpoint,
         json={"query": query, "variables": variables},
         headers={
             "X-Shopify-Access-Token": access_token,
             "Content-Type": "application/json",
         },
-        timeout=30,
     )
     print(f"[WEBHOOK] {topic} -> {resp.status_code}")
     print(f"[WEBHOOK] Response for {topic}: {resp.text}")
@@ -325,7 +362,7 @@ def register_webhook_rest(shop: str, access_token: str, topic: str, callback_url
 
     print(f"[WEBHOOK] Registering {topic}")
 
-    resp = requests.post(
+    resp = shopify_client.post(
         endpoint,
         json={
             "webhook": {
@@ -338,7 +375,6 @@ def register_webhook_rest(shop: str, access_token: str, topic: str, callback_url
             "X-Shopify-Access-Token": access_token,
             "Content-Type": "application/json",
         },
-        timeout=30,
     )
     print(f"[WEBHOOK] {topic} -> {resp.status_code}")
     print(f"[WEBHOOK] Response for {topic}: {resp.text}")
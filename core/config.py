@@ -22,9 +22,46 @@ SHOPIFY_API_SECRET = os.getenv("SHOPIFY_API_SECRET")
 SCOPES = os.getenv("SCOPES", "read_products,read_orders")
 REDIRECT_URI = os.getenv("REDIRECT_URI")
 SHOPIFY_API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2026-04")
+# Overrides https://{shop} for Admin API calls, e.g. to point at scripts/fake_shopify.py
+SHOPIFY_ADMIN_BASE_URL = _strip_trailing_slash(os.getenv("SHOPIFY_ADMIN_BASE_URL", ""))
 SHOPIFY_BILLING_TEST = os.getenv("SHOPIFY_BILLING_TEST", "false").strip().lower() == "true"
 SUPPORT_EMAIL = os.getenv("SUPPORT_EMAIL") or os.getenv("ZOHO_EMAIL") or "support@example.com"
 APP_URL = _strip_trailing_slash(os.getenv("APP_URL", ""))
 BACKEND_PUBLIC_URL = APP_URL or _base_url_from_redirect_uri(REDIRECT_URI or "")
 FRONTEND_APP_URL = _strip_trailing_slash(os.getenv("FRONTEND_APP_URL", "http://localhost:3000"))
 CRON_SECRET = os.getenv("CRON_SECRET", "")
+SHOPIFY_BULK_VARIANT_THRESHOLD = int(os.getenv("SHOPIFY_BULK_VARIANT_THRESHOLD", "5000"))
+SHOPIFY_BULK_POLL_SECONDS = float(os.getenv("SHOPIFY_BULK_POLL_SECONDS", "2"))
+SHOPIFY_BULK_TIMEOUT_SECONDS = int(os.getenv("SHOPIFY_BULK_TIMEOUT_SECONDS", "1800"))
+SHOPIFY_BULK_ORDER_THRESHOLD = int(os.getenv("SHOPIFY_BULK_ORDER_THRESHOLD", "2000"))
+SHOPIFY_HTTP_TIMEOUT_SECONDS = float(os.getenv("SHOPIFY_HTTP_TIMEOUT_SECONDS", "30"))
+SHOPIFY_HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("SHOPIFY_HTTP_CONNECT_TIMEOUT_SECONDS", "10"))
+SHOPIFY_HTTP_MAX_CONNECTIONS = int(os.getenv("SHOPIFY_HTTP_MAX_CONNECTIONS", "20"))
+SHOPIFY_HTTP_MAX_KEEPALIVE = int(os.getenv("SHOPIFY_HTTP_MAX_KEEPALIVE", "10"))
+SHOPIFY_THROTTLE_MAX_RETRIES = int(os.getenv("SHOPIFY_THROTTLE_MAX_RETRIES", "5"))
+SHOPIFY_SALES_SHARD_ORDER_THRESHOLD = int(os.getenv("SHOPIFY_SALES_SHARD_ORDER_THRESHOLD", "500"))
+SHOPIFY_SALES_SHARD_DAYS = int(os.getenv("SHOPIFY_SALES_SHARD_DAYS", "7"))
+SHOPIFY_SALES_SHARD_WORKERS = int(os.getenv("SHOPIFY_SALES_SHARD_WORKERS", "4"))
+SHOPIFY_RETRY_MAX_ATTEMPTS = int(os.getenv("SHOPIFY_RETRY_MAX_ATTEMPTS", "4"))
+SHOPIFY_RETRY_BASE_SECONDS = float(os.getenv("SHOPIFY_RETRY_BASE_SECONDS", "0.5"))
+SHOPIFY_RETRY_MAX_SECONDS = float(os.getenv("SHOPIFY_RETRY_MAX_SECONDS", "8"))
+SHOPIFY_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("SHOPIFY_CIRCUIT_FAILURE_THRESHOLD", "5"))
+SHOPIFY_CIRCUIT_RESET_SECONDS = float(os.getenv("SHOPIFY_CIRCUIT_RESET_SECONDS", "60"))
+REPORT_DEFAULT_RESTOCK_DAYS = int(os.getenv("REPORT_DEFAULT_RESTOCK_DAYS", "30"))
+REPORT_DEFAULT_MINIMUM_VALUE = int(os.getenv("REPORT_DEFAULT_MINIMUM_VALUE", "1"))
+READ_REPLICA_LAG_TOLERANCE_SECONDS = float(os.getenv("READ_REPLICA_LAG_TOLERANCE_SECONDS", "30"))
+# Monthly sales partitions: kept this many months back, created this many ahead
+SALES_RETENTION_MONTHS = int(os.getenv("SALES_RETENTION_MONTHS", "24"))
+SALES_PARTITION_MONTHS_AHEAD = int(os.getenv("SALES_PARTITION_MONTHS_AHEAD", "3"))
+# Detach expired partitions instead of dropping them
+SALES_PARTITION_ARCHIVE = os.getenv("SALES_PARTITION_ARCHIVE", "false").strip().lower() == "true"
+# "sql" runs the report forecast in Postgres, "numpy" in a local process pool
+FORECAST_ENGINE = os.getenv("FORECAST_ENGINE", "sql").strip().lower()
+FORECAST_ENGINE_WORKERS = int(os.getenv("FORECAST_ENGINE_WORKERS", "2"))
+# In-process cache of /requests/report results, keyed by Shop.data_version
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "256"))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# How long a request waits on another request computing the same report before computing its own
+REPORT_CACHE_WAIT_SECONDS = float(os.getenv("REPORT_CACHE_WAIT_SECONDS", "15"))
+# PREPARE/EXECUTE for hot report queries; disable behind transaction-pooling proxies
+DATABASE_PREPARED_STATEMENTS = os.getenv("DATABASE_PREPARED_STATEMENTS", "true").strip().lower() == "true"
@@ -1,11 +1,14 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from fastapi import Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from core.config import READ_REPLICA_LAG_TOLERANCE_SECONDS
 from core.session_token import get_session_shop_domain
-from db import SessionLocal
-from models import Shop
+from db import AsyncSessionLocal, ReadSessionLocal, SessionLocal
+from models import ForecastSnapshot, Shop, SyncState
 
 
 def get_db():
@@ -16,11 +19,12 @@ def get_db():
         db.close()
 
 
-def get_installed_shop(
-    shop_domain: str = Depends(get_session_shop_domain),
-    db: Session = Depends(get_db),
-) -> Shop:
-    store = db.query(Shop).filter(Shop.shop_domain == shop_domain).first()
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _require_installed(store: Shop | None) -> Shop:
     if not store:
         raise HTTPException(status_code=404, detail="Shop not found")
     if not store.is_active:
@@ -28,6 +32,71 @@ def get_installed_shop(
     return store
 
 
+def get_installed_shop(
+    shop_domain: str = Depends(get_session_shop_domain),
+    db: Session = Depends(get_db),
+) -> Shop:
+    store = db.query(Shop).filter(Shop.shop_domain == shop_domain).first()
+    return _require_installed(store)
+
+
+async def get_installed_shop_async(
+    shop_domain: str = Depends(get_session_shop_domain),
+    db: AsyncSession = Depends(get_async_db),
+) -> Shop:
+    result = await db.execute(select(Shop).where(Shop.shop_domain == shop_domain))
+    return _require_installed(result.scalars().first())
+
+
+def _recently_written(db: Session, shop_id) -> bool:
+    """True while the shop's last sync may not have reached the replica yet."""
+    last_synced = db.query(func.max(SyncState.synced_at)).filter(SyncState.shop_id == shop_id).scalar()
+    last_snapshot = (
+        db.query(ForecastSnapshot.computed_at)
+        .filter(ForecastSnapshot.shop_id == shop_id)
+        .scalar()
+    )
+    last_write = max((value for value in (last_synced, last_snapshot) if value), default=None)
+    if last_write is None:
+        return False
+
+    tolerance = timedelta(seconds=READ_REPLICA_LAG_TOLERANCE_SECONDS)
+    return datetime.now(timezone.utc) - last_write < tolerance
+
+
+def get_read_db(
+    store: Shop = Depends(get_installed_shop),
+    db: Session = Depends(get_db),
+):
+    """
+    Session for read-only endpoints: the replica from DATABASE_READ_URL, or
+    the primary when no replica is configured or the shop synced within
+    READ_REPLICA_LAG_TOLERANCE_SECONDS.
+    """
+    if ReadSessionLocal is None or _recently_written(db, store.id):
+        yield db
+        return
+
+    read_db = ReadSessionLocal()
+    try:
+        yield read_db
+    finally:
+        read_db.close()
+
+
+def get_read_session_factory(
+    store: Shop = Depends(get_installed_shop),
+    db: Session = Depends(get_db),
+):
+    """
+    Session factory picked like get_read_db, for reads that outlive the
+    request's own sessions (a StreamingResponse body runs after they close).
+    """
+    if ReadSessionLocal is None or _recently_written(db, store.id):
+        return SessionLocal
+    return ReadSessionLocal
+
+
 def get_active_shop(
     store: Shop = Depends(get_installed_shop),
 ) -> Shop:
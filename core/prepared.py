@@ -0,0 +1,69 @@
+import re
+import zlib
+from functools import lru_cache
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from core.config import DATABASE_PREPARED_STATEMENTS
+
+
+# :name binds, but not the second half of a ::type cast
+_BIND = re.compile(r"(?<![:\w]):(\w+)")
+
+
+@lru_cache(maxsize=64)
+def _positional(name: str, sql: str, types: tuple[tuple[str, str], ...]) -> tuple[str, str, tuple[str, ...]]:
+    """Statement name, typed PREPARE head and body with $n parameters, and the bind names in $n order."""
+    names = []
+
+    def replace(match):
+        bind = match.group(1)
+        if bind not in names:
+            names.append(bind)
+        return f"${names.index(bind) + 1}"
+
+    body = _BIND.sub(replace, sql)
+    declared = dict(types)
+
+    missing = [bind for bind in names if bind not in declared]
+    if missing:
+        raise ValueError(f"No parameter type declared for {', '.join(missing)} in {name}")
+
+    # The SQL's and the types' checksum is part of the name, so a changed
+    # query never reuses a plan prepared for the old one
+    statement_name = f"{name}_{zlib.crc32(repr((sql, types)).encode()):08x}"
+    head = f"{statement_name}({', '.join(declared[bind] for bind in names)})"
+    return statement_name, f"{head} AS {body}", tuple(names)
+
+
+def execute_prepared(db: Session, name: str, sql: str, params: dict, types: dict[str, str]):
+    """
+    Run `sql` (with :name binds) as a server-side prepared statement.
+
+    `types` gives the SQL type of every bind, and the statement is
+    PREPAREd with them (PREPARE name(uuid, integer, ...)), so Postgres
+    never has to infer a type for a parameter used in several contexts.
+    It is PREPAREd once per database connection, which is recorded in
+    the connection's info dict, then EXECUTEd, so Postgres skips parse
+    and analysis on every later call and can settle on a generic plan.
+    Prepared statements outlive transactions but not the connection. Set
+    DATABASE_PREPARED_STATEMENTS=false behind a transaction-pooling
+    proxy, where sessions are not pinned to one server connection.
+    """
+    if not DATABASE_PREPARED_STATEMENTS:
+        return db.execute(text(sql), params)
+
+    statement_name, prepare, names = _positional(name, sql, tuple(sorted(types.items())))
+    connection = db.connection()
+    prepared = connection.info.setdefault("prepared_statements", set())
+
+    if statement_name not in prepared:
+        connection.exec_driver_sql(f"PREPARE {prepare}")
+        prepared.add(statement_name)
+
+    arguments = ", ".join(f":{bind}" for bind in names)
+    return db.execute(
+        text(f"EXECUTE {statement_name}({arguments})"),
+        {bind: params[bind] for bind in names},
+    )
@@ -0,0 +1,95 @@
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError
+
+
+def estimate_size(value) -> int:
+    """Rough retained size in bytes of JSON-like data (dicts, lists, scalars)."""
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+
+    return size
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of computed results, bounded by entry count and by
+    the estimated memory of the stored values.
+
+    Keys are expected to embed whatever version makes an entry stale, so
+    nothing is invalidated explicitly: old versions just age out. While a
+    key is being computed, other callers for the same key wait up to
+    wait_seconds for that computation instead of starting their own
+    (single-flight); past that they compute it themselves, so one stuck
+    computation cannot hold every caller. Cached values are shared
+    between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, wait_seconds: float | None = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.wait_seconds = wait_seconds
+        self.entries = OrderedDict()  # key -> (value, size)
+        self.in_flight = {}  # key -> Future
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+
+        if not leader:
+            try:
+                return future.result(timeout=self.wait_seconds)
+            except TimeoutError:
+                # The leader still stores its result when it finishes
+                return compute()
+
+        try:
+            value = compute()
+        except BaseException as exc:
+            with self.lock:
+                del self.in_flight[key]
+            future.set_exception(exc)
+            raise
+
+        self._store(key, value)
+        future.set_result(value)
+        return value
+
+    def _store(self, key, value) -> None:
+        size = estimate_size(value)
+
+        with self.lock:
+            del self.in_flight[key]
+
+            # Larger than the whole budget: served once, never kept
+            if size > self.max_bytes:
+                return
+
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
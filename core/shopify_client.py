@@ -0,0 +1,114 @@
+import threading
+from contextlib import contextmanager
+
+import httpx
+
+from core.config import (
+    SHOPIFY_HTTP_CONNECT_TIMEOUT_SECONDS,
+    SHOPIFY_HTTP_MAX_CONNECTIONS,
+    SHOPIFY_HTTP_MAX_KEEPALIVE,
+    SHOPIFY_HTTP_TIMEOUT_SECONDS,
+)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# One keep-alive pool per host, shared by every request to that shop
+_sync_clients: dict[str, httpx.Client] = {}
+_async_clients: dict[str, httpx.AsyncClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _client_options() -> dict:
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "timeout": httpx.Timeout(
+            SHOPIFY_HTTP_TIMEOUT_SECONDS,
+            connect=SHOPIFY_HTTP_CONNECT_TIMEOUT_SECONDS,
+        ),
+        "limits": httpx.Limits(
+            max_connections=SHOPIFY_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=SHOPIFY_HTTP_MAX_KEEPALIVE,
+        ),
+        "headers": {"Accept-Encoding": "gzip"},
+        "follow_redirects": True,
+    }
+
+
+def _host(url: str) -> str:
+    return httpx.URL(url).host
+
+
+def get_client(url: str) -> httpx.Client:
+    host = _host(url)
+    client = _sync_clients.get(host)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _sync_clients.get(host)
+        if client is None:
+            client = httpx.Client(**_client_options())
+            _sync_clients[host] = client
+        return client
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    host = _host(url)
+    client = _async_clients.get(host)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _async_clients.get(host)
+        if client is None:
+            client = httpx.AsyncClient(**_client_options())
+            _async_clients[host] = client
+        return client
+
+
+def request(method: str, url: str, **kwargs) -> httpx.Response:
+    return get_client(url).request(method, url, **kwargs)
+
+
+def post(url: str, **kwargs) -> httpx.Response:
+    return request("POST", url, **kwargs)
+
+
+def get(url: str, **kwargs) -> httpx.Response:
+    return request("GET", url, **kwargs)
+
+
+@contextmanager
+def stream(method: str, url: str, **kwargs):
+    with get_client(url).stream(method, url, **kwargs) as response:
+        yield response
+
+
+async def arequest(method: str, url: str, **kwargs) -> httpx.Response:
+    return await get_async_client(url).request(method, url, **kwargs)
+
+
+async def apost(url: str, **kwargs) -> httpx.Response:
+    return await arequest("POST", url, **kwargs)
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    return await arequest("GET", url, **kwargs)
+
+
+async def close_clients() -> None:
+    with _clients_lock:
+        sync_clients = list(_sync_clients.values())
+        async_clients = list(_async_clients.values())
+        _sync_clients.clear()
+        _async_clients.clear()
+
+    for client in sync_clients:
+        client.close()
+    for client in async_clients:
+        await client.aclose()
@@ -0,0 +1,102 @@
+import random
+import threading
+import time
+
+from core.config import (
+    SHOPIFY_CIRCUIT_FAILURE_THRESHOLD,
+    SHOPIFY_CIRCUIT_RESET_SECONDS,
+    SHOPIFY_RETRY_BASE_SECONDS,
+    SHOPIFY_RETRY_MAX_SECONDS,
+)
+
+
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504, 520, 522, 524}
+RETRYABLE_GRAPHQL_CODES = {"INTERNAL_SERVER_ERROR", "TIMEOUT"}
+
+
+class ShopifyCircuitOpenError(Exception):
+    pass
+
+
+class ShopifyUnavailableError(Exception):
+    pass
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given 1-based attempt."""
+    ceiling = min(SHOPIFY_RETRY_MAX_SECONDS, SHOPIFY_RETRY_BASE_SECONDS * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
+
+
+def is_retryable_graphql_error(errors) -> bool:
+    if not isinstance(errors, list):
+        return False
+
+    return any(
+        isinstance(error, dict)
+        and (error.get("extensions") or {}).get("code") in RETRYABLE_GRAPHQL_CODES
+        for error in errors
+    )
+
+
+class CircuitBreaker:
+    """
+    Per-shop breaker for transient Shopify failures.
+
+    After failure_threshold consecutive failures the circuit opens and
+    calls fail fast for reset_seconds; then a single trial call is let
+    through and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = SHOPIFY_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = SHOPIFY_CIRCUIT_RESET_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def before_request(self, shop_domain: str) -> None:
+        with self.lock:
+            if self.opened_at is None:
+                return
+
+            if time.monotonic() - self.opened_at < self.reset_seconds or self.trial_in_flight:
+                raise ShopifyCircuitOpenError(f"Shopify circuit open for {shop_domain}")
+
+            self.trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """A throttled call proves nothing either way: leave the state, let the next trial through."""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(shop_domain: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(shop_domain)
+        if breaker is None:
+            breaker = CircuitBreaker()
+            _breakers[shop_domain] = breaker
+        return breaker
@@ -0,0 +1,106 @@
+import threading
+import time
+
+
+# Defaults for a standard plan until Shopify reports the real bucket
+DEFAULT_MAXIMUM_AVAILABLE = 1000.0
+DEFAULT_RESTORE_RATE = 50.0
+
+
+class ShopifyThrottledError(Exception):
+    pass
+
+
+class CostBucket:
+    """
+    Client-side mirror of Shopify's leaky bucket for one shop.
+
+    Shopify reports throttleStatus on every GraphQL response; between
+    responses the bucket is assumed to refill at restoreRate points/sec.
+    """
+
+    def __init__(
+        self,
+        maximum_available: float = DEFAULT_MAXIMUM_AVAILABLE,
+        restore_rate: float = DEFAULT_RESTORE_RATE,
+    ):
+        self.maximum_available = maximum_available
+        self.restore_rate = restore_rate
+        self.currently_available = maximum_available
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        self.currently_available = min(
+            self.maximum_available,
+            self.currently_available + elapsed * self.restore_rate,
+        )
+        self.updated_at = now
+
+    def available(self) -> float:
+        with self.lock:
+            self._refill(time.monotonic())
+            return self.currently_available
+
+    def acquire(self, cost: float) -> None:
+        """Block just long enough for `cost` points to be available, then reserve them."""
+        cost = min(cost, self.maximum_available)
+
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.currently_available >= cost:
+                    self.currently_available -= cost
+                    return
+                delay = (cost - self.currently_available) / self.restore_rate
+
+            time.sleep(delay)
+
+    def update(self, throttle_status: dict | None) -> None:
+        if not throttle_status:
+            return
+
+        with self.lock:
+            self.maximum_available = float(
+                throttle_status.get("maximumAvailable") or self.maximum_available
+            )
+            self.restore_rate = float(
+                throttle_status.get("restoreRate") or self.restore_rate
+            )
+            self.currently_available = float(
+                throttle_status.get("currentlyAvailable", self.currently_available)
+            )
+            self.updated_at = time.monotonic()
+
+    def page_size(self, max_first: int, cost_per_item: float | None) -> int:
+        """Largest `first:` that fits the remaining budget (never below one second of restore)."""
+        if not cost_per_item:
+            return max_first
+
+        budget = max(self.available(), self.restore_rate)
+        return max(1, min(max_first, int(budget // cost_per_item)))
+
+
+_buckets: dict[str, CostBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(shop_domain: str) -> CostBucket:
+    with _buckets_lock:
+        bucket = _buckets.get(shop_domain)
+        if bucket is None:
+            bucket = CostBucket()
+            _buckets[shop_domain] = bucket
+        return bucket
+
+
+def is_throttled(errors) -> bool:
+    if not isinstance(errors, list):
+        return False
+
+    return any(
+        isinstance(error, dict)
+        and (error.get("extensions") or {}).get("code") == "THROTTLED"
+        for error in errors
+    )
@@ -4,10 +4,11 @@ import hmac
 import json
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import SHOPIFY_API_SECRET
-from core.deps import get_db
+from core.deps import get_async_db
 from models import Shop
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
@@ -56,27 +57,35 @@ async def read_verified_webhook(request: Request) -> tuple[bytes, dict, str | No
     return raw_body, payload, topic, shop_domain
 
 
-def delete_shop_data(db: Session, shop_domain: str | None) -> None:
-    shop = db.query(Shop).filter(Shop.shop_domain == shop_domain).first() if shop_domain else None
+async def get_shop_by_domain(db: AsyncSession, shop_domain: str | None) -> Shop | None:
+    if not shop_domain:
+        return None
+
+    result = await db.execute(select(Shop).where(Shop.shop_domain == shop_domain))
+    return result.scalars().first()
+
+
+async def delete_shop_data(db: AsyncSession, shop_domain: str | None) -> None:
+    shop = await get_shop_by_domain(db, shop_domain)
     if shop:
-        db.delete(shop)
-        db.commit()
+        await db.delete(shop)
+        await db.commit()
 
 
-def mark_shop_uninstalled(db: Session, shop_domain: str | None) -> None:
-    shop = db.query(Shop).filter(Shop.shop_domain == shop_domain).first() if shop_domain else None
+async def mark_shop_uninstalled(db: AsyncSession, shop_domain: str | None) -> None:
+    shop = await get_shop_by_domain(db, shop_domain)
     if not shop:
         return
 
     shop.is_active = False
-    db.commit()
+    await db.commit()
 
 
-def handle_subscription_update(db: Session, payload: dict, shop_domain: str | None) -> None:
+async def handle_subscription_update(db: AsyncSession, payload: dict, shop_domain: str | None) -> None:
     if not shop_domain:
         raise HTTPException(status_code=400, detail="Missing shop domain")
 
-    shop = db.query(Shop).filter(Shop.shop_domain == shop_domain).first()
+    shop = await get_shop_by_domain(db, shop_domain)
     if not shop:
         return
 
@@ -90,19 +99,19 @@ def handle_subscription_update(db: Session, payload: dict, shop_domain: str | No
     if subscription_id:
         shop.subscription_id = subscription_id
 
-    db.commit()
+    await db.commit()
 
 
-async def process_webhook(request: Request, db: Session) -> Response:
+async def process_webhook(request: Request, db: AsyncSession) -> Response:
     _, payload, topic, shop_domain = await read_verified_webhook(request)
     normalized_topic = (topic or "").lower()
 
     if normalized_topic == "app/uninstalled":
-        mark_shop_uninstalled(db, shop_domain)
+        await mark_shop_uninstalled(db, shop_domain)
         return Response(status_code=200)
 
     if normalized_topic == "app_subscriptions/update":
-        handle_subscription_update(db, payload, shop_domain)
+        await handle_subscription_update(db, payload, shop_domain)
         return Response(status_code=200)
 
     if normalized_topic == "customers/data_request":
@@ -112,26 +121,26 @@ async def process_webhook(request: Request, db: Session) -> Response:
         return Response(status_code=200)
 
     if normalized_topic == "shop/redact":
-        delete_shop_data(db, shop_domain)
+        await delete_shop_data(db, shop_domain)
         return Response(status_code=200)
 
     return Response(status_code=200)
 
 
 @router.post("")
-async def webhooks(request: Request, db: Session = Depends(get_db)):
+async def webhooks(request: Request, db: AsyncSession = Depends(get_async_db)):
     return await process_webhook(request, db)
 
 
 @router.post("/")
-async def webhooks_slash(request: Request, db: Session = Depends(get_db)):
+async def webhooks_slash(request: Request, db: AsyncSession = Depends(get_async_db)):
     return await process_webhook(request, db)
 
 
 @router.post("/app-uninstalled")
-async def app_uninstalled(request: Request, db: Session = Depends(get_db)):
+async def app_uninstalled(request: Request, db: AsyncSession = Depends(get_async_db)):
     _, payload, _, shop_domain = await read_verified_webhook(request)
-    mark_shop_uninstalled(
+    await mark_shop_uninstalled(
         db,
         shop_domain or normalize_shop(payload.get("myshopify_domain")),
     )
@@ -139,14 +148,14 @@ async def app_uninstalled(request: Request, db: Session = Depends(get_db)):
 
 
 @router.post("/uninstalled")
-async def app_uninstalled_legacy(request: Request, db: Session = Depends(get_db)):
+async def app_uninstalled_legacy(request: Request, db: AsyncSession = Depends(get_async_db)):
     return await app_uninstalled(request, db)
 
 
 @router.post("/app_subscriptions_update")
-async def app_subscriptions_update(request: Request, db: Session = Depends(get_db)):
+async def app_subscriptions_update(request: Request, db: AsyncSession = Depends(get_async_db)):
     _, payload, _, shop_domain = await read_verified_webhook(request)
-    handle_subscription_update(db, payload, shop_domain)
+    await handle_subscription_update(db, payload, shop_domain)
     return Response(status_code=200)
 
 
@@ -173,12 +182,12 @@ async def customers_redact_rest(request: Request):
 
 
 @router.post("/shop/redact")
-async def shop_redact(request: Request, db: Session = Depends(get_db)):
+async def shop_redact(request: Request, db: AsyncSession = Depends(get_async_db)):
     _, payload, _, shop_domain = await read_verified_webhook(request)
-    delete_shop_data(db, shop_domain or normalize_shop(payload.get("shop_domain")))
+    await delete_shop_data(db, shop_domain or normalize_shop(payload.get("shop_domain")))
     return Response(status_code=200)
 
 
 @router.post("/shop_redact")
-async def shop_redact_rest(request: Request, db: Session = Depends(get_db)):
+async def shop_redact_rest(request: Request, db: AsyncSession = Depends(get_async_db)):
     return await shop_redact(request, db)
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
@@ -6,9 +8,39 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional read replica for report and dashboard queries
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+
+
+def _async_database_url(url: str):
+    """Same database through asyncpg; libpq's sslmode becomes asyncpg's ssl."""
+    async_url = make_url(url).set(drivername="postgresql+asyncpg")
+
+    sslmode = async_url.query.get("sslmode")
+    if sslmode:
+        async_url = async_url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+
+    return async_url
+
 
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+read_engine = create_engine(DATABASE_READ_URL, pool_pre_ping=True) if DATABASE_READ_URL else None
+
+ReadSessionLocal = (
+    sessionmaker(bind=read_engine, autoflush=False, autocommit=False)
+    if read_engine is not None
+    else None
+)
+
+# For async endpoints, so they never block the event loop on the database
+async_engine = create_async_engine(
+    os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL),
+    pool_pre_ping=True,
+)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
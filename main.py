@@ -4,6 +4,9 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from core import shopify_client
+from db import async_engine
+from services.forecast_engine import shutdown_pool
 from core.config import FRONTEND_APP_URL
 from core.auth import normalize_shop, router as auth_router
 from core.session_token import verify_shopify_session_token
@@ -40,6 +43,13 @@ app.add_middleware(
 )
 
 
+@app.on_event("shutdown")
+async def close_shopify_clients():
+    await shopify_client.close_clients()
+    await async_engine.dispose()
+    shutdown_pool()
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(_: Request, exc: HTTPException):
     if exc.status_code == 401:
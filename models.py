@@ -1,5 +1,5 @@
-from sqlalchemy import BigInteger, Column, Date, ForeignKey, Numeric, String, Boolean, DateTime, Integer, UniqueConstraint,Index
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Column, Date, ForeignKey, Numeric, String, Boolean, DateTime, Integer, UniqueConstraint,Index, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from db import Base
@@ -20,6 +20,8 @@ class Shop(Base):
     subscription_id = Column(String, nullable=True)        # gid://shopify/AppSubscription/123
     subscription_status = Column(String, nullable=True)    # ACTIVE, PENDING, DECLINED, EXPIRED, FROZEN
     trial_ends_at = Column(DateTime(timezone=True), nullable=True)
+    # Bumped whenever synced data or location preferences change; part of report cache keys
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     inventory_items = relationship(
         "Inventory",
@@ -45,6 +47,25 @@ class Shop(Base):
         cascade="all, delete-orphan"
     )
 
+    sync_states = relationship(
+        "SyncState",
+        back_populates="shop",
+        cascade="all, delete-orphan"
+    )
+
+    sales_daily = relationship(
+        "SalesDaily",
+        back_populates="shop",
+        cascade="all, delete-orphan"
+    )
+
+    forecast_snapshot = relationship(
+        "ForecastSnapshot",
+        back_populates="shop",
+        uselist=False,
+        cascade="all, delete-orphan"
+    )
+
 
 class Inventory(Base):
     __tablename__ = "inventory"
@@ -66,6 +87,14 @@ class Inventory(Base):
     __table_args__ = (
         UniqueConstraint("shop_id", "variant_id", "location_id", name="uq_inventory_variant_location"),
         Index("idx_inventory_shop_variant", "shop_id", "variant_id"),
+        # Dashboard KPIs: only rows with a real SKU, answered from the index
+        Index(
+            "idx_inventory_shop_sku_kpi",
+            "shop_id",
+            "sku",
+            postgresql_include=["inventory", "price"],
+            postgresql_where=text("sku IS NOT NULL AND sku <> ''"),
+        ),
     )
 
 
@@ -78,6 +107,10 @@ class Sales(Base):
 
     variant_id = Column(BigInteger, nullable=False)
 
+    order_id = Column(BigInteger, nullable=True)  # Shopify order ID
+
+    line_item_id = Column(BigInteger, nullable=True)  # Shopify line item ID
+
     title = Column(String(200))
     variant_title = Column(String(100))
 
@@ -85,12 +118,93 @@ class Sales(Base):
 
     quantity_sold = Column(Integer, nullable=False)
 
-    created_at = Column(Date, nullable=False, index=True)
+    # Partition key, so it is part of every unique constraint
+    created_at = Column(Date, primary_key=True, index=True)
 
     shop = relationship("Shop", back_populates="sales_records")
 
     __table_args__ = (
-        Index("idx_sales_shop_variant_date", "shop_id", "variant_id", "created_at"),
+        Index(
+            "idx_sales_shop_variant_date",
+            "shop_id",
+            "variant_id",
+            "created_at",
+            postgresql_include=["quantity_sold"],
+        ),
+        Index("idx_sales_shop_order", "shop_id", "order_id"),
+        Index("idx_sales_shop_date", "shop_id", "created_at"),
+        UniqueConstraint("shop_id", "order_id", "line_item_id", "created_at", name="uq_sales_order_line_item"),
+        # Monthly partitions are managed by services/sales_partitions.py
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class SalesDaily(Base):
+    """Units sold per variant per day, rebuilt from sales on every sales sync."""
+    __tablename__ = "sales_daily"
+
+    shop_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("shops.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    variant_id = Column(BigInteger, primary_key=True)
+    day = Column(Date, primary_key=True)
+    quantity_sold = Column(Integer, nullable=False)
+
+    shop = relationship("Shop", back_populates="sales_daily")
+
+    __table_args__ = (
+        Index("idx_sales_daily_shop_day", "shop_id", "day", postgresql_include=["quantity_sold"]),
+        Index("idx_sales_daily_shop_variant", "shop_id", "variant_id", postgresql_include=["quantity_sold"]),
+    )
+
+
+class ForecastSnapshot(Base):
+    """Report rows for the default parameters, recomputed after each sync."""
+    __tablename__ = "forecast_snapshots"
+
+    shop_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("shops.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")  # Shop.data_version it was computed at
+    restock_days = Column(Integer, nullable=False)
+    minimum_value = Column(Integer, nullable=False)
+    sales_duration = Column(Integer, nullable=False)
+    location_ids = Column(ARRAY(BigInteger), nullable=False)  # sorted
+    rows = Column(JSONB, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+
+    shop = relationship("Shop", back_populates="forecast_snapshot")
+
+
+# SyncState.resource values
+SALES_RESOURCE = "sales"
+INVENTORY_RESOURCE = "inventory"
+
+
+class SyncState(Base):
+    __tablename__ = "sync_states"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    shop_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("shops.id", ondelete="CASCADE"),
+        nullable=False
+    )
+
+    resource = Column(String(20), nullable=False)             # sales, inventory
+    watermark = Column(DateTime(timezone=True), nullable=True)  # last Shopify updated_at fetched
+    window_start = Column(Date, nullable=True)
+    synced_at = Column(DateTime(timezone=True), nullable=True)
+
+    shop = relationship("Shop", back_populates="sync_states")
+
+    __table_args__ = (
+        UniqueConstraint("shop_id", "resource", name="uq_sync_state_shop_resource"),
     )
 
 
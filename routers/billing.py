@@ -2,13 +2,13 @@
 
 from datetime import datetime, timezone, timedelta
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.auth import get_valid_shopify_access_token
+from core import shopify_client
+from core.auth import aget_valid_shopify_access_token
 from core.config import SHOPIFY_API_VERSION
-from core.deps import get_db, get_installed_shop
+from core.deps import get_async_db, get_installed_shop, get_installed_shop_async
 from models import Shop
 
 GET_SUBSCRIPTION_QUERY = """
@@ -31,15 +31,14 @@ router = APIRouter(prefix="/billing", tags=["billing"])
 async def run_graphql(shop_domain: str, access_token: str, query: str, variables: dict):
     url = f"https://{shop_domain}/admin/api/{SHOPIFY_API_VERSION}/graphql.json"
 
-    async with httpx.AsyncClient() as client:
-        res = await client.post(
-            url,
-            json={"query": query, "variables": variables},
-            headers={
-                "X-Shopify-Access-Token": access_token,
-                "Content-Type": "application/json",
-            },
-        )
+    res = await shopify_client.apost(
+        url,
+        json={"query": query, "variables": variables},
+        headers={
+            "X-Shopify-Access-Token": access_token,
+            "Content-Type": "application/json",
+        },
+    )
 
     request_id = res.headers.get("x-request-id")
     print("[BILLING] SHOPIFY REQUEST ID:", request_id)
@@ -93,10 +92,10 @@ def _billing_status_payload(store: Shop) -> dict:
 
 @router.get("/sync")
 async def sync_billing_status(
-    shop: Shop = Depends(get_installed_shop),
-    db: Session = Depends(get_db),
+    shop: Shop = Depends(get_installed_shop_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    access_token = get_valid_shopify_access_token(db, shop.shop_domain)
+    access_token = await aget_valid_shopify_access_token(db, shop.shop_domain)
 
     result = await run_graphql(
         shop.shop_domain,
@@ -124,7 +123,7 @@ async def sync_billing_status(
         shop.subscription_status = "INACTIVE"
         shop.trial_ends_at = None
 
-    db.commit()
+    await db.commit()
 
     return {"subscription_status": shop.subscription_status}
 
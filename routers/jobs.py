@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 from core.config import CRON_SECRET
 from core.deps import get_db
 
-from models import Shop, Notification, Sales
+from models import Shop, Notification
 
 from core.auth import ORDERS_SCOPE
 from services.shopify import Operations
@@ -16,6 +16,9 @@ from services.notification_engine import low_stock_items
 from services.inventory_repo import get_sales_period
 from services.transformation import csv_maker
 from services.email_service import send_email_with_csv
+from services.sync_service import sync_sales_window
+from services.forecast_snapshot import refresh_forecast_snapshot
+from services.sales_partitions import maintain_sales_partitions
 
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
@@ -71,22 +74,22 @@ def weekly_notifications(
                 required_scopes=(ORDERS_SCOPE,),
             )
 
-            # Delete old sales
-            ops.delete_sales(shop.id, db)
-            db.commit()
-
-            # Fetch and insert new sales
-            rows = ops.get_sales(start_date, end_date)
-            sales_rows = [{"shop_id": shop.id, **row} for row in rows]
+            # Fetch orders changed since the last sync and upsert them
+            result = sync_sales_window(db, ops, shop.id, start_date, end_date)
 
-            if not sales_rows:
+            if result["mode"] == "full" and not result["rows"]:
                 print("[CRON] No sales returned")
                 continue
 
-            db.bulk_insert_mappings(Sales, sales_rows)
-            db.commit()
+            print(f"[CRON] Wrote {result['rows']} sales rows ({result['mode']})")
 
-            print(f"[CRON] Inserted {len(sales_rows)} sales rows")
+            # On failure the stale snapshot stops matching the bumped
+            # data_version, so reports fall back to computing live
+            try:
+                refresh_forecast_snapshot(db, shop.id)
+            except Exception as e:
+                print(f"[CRON] Forecast snapshot refresh failed: {e}")
+                db.rollback()
 
             time.sleep(1)
 
@@ -152,3 +155,16 @@ def weekly_notifications(
             continue
 
     return {"status": "completed"}
+
+
+@router.get("/sales-partitions")
+def sales_partitions(
+    _: None = Depends(require_cron_secret),
+    db: Session = Depends(get_db),
+):
+    # Run monthly (or more often): creates upcoming months, expires old ones
+    result = maintain_sales_partitions(db)
+
+    print(f"[CRON] Sales partitions: {result}")
+
+    return {"status": "completed", **result}
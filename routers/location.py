@@ -8,6 +8,7 @@ from core.auth import PRODUCTS_SCOPE
 from core.deps import get_active_shop, get_db
 from models import Shop, Location, ShopLocationPreference
 from services.shopify import Operations
+from services.sync_service import bump_data_version
 
 router = APIRouter()
 
@@ -111,6 +112,8 @@ def sync_locations(
             locations_list
         )
 
+        # The report falls back to every location when none are preferred
+        bump_data_version(db, shop.id)
         db.commit()
 
         return {
@@ -166,6 +169,7 @@ def set_location_preferences(
             ]
         )
 
+        bump_data_version(db, shop.id)
         db.commit()
 
         return {
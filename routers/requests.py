@@ -8,14 +8,18 @@ from fastapi import APIRouter, Depends, HTTPException,Query,status, Request
 from fastapi.responses import RedirectResponse, HTMLResponse, StreamingResponse
 from sqlalchemy import func
 from sqlalchemy.orm import Session
-from models import Inventory, Shop, Sales, Location
+from models import Inventory, Shop, SalesDaily
 from core.auth import ORDERS_SCOPE, PRODUCTS_SCOPE, get_valid_shop
-from core.deps import get_active_shop, get_db
+from core.deps import get_active_shop, get_db, get_read_db, get_read_session_factory
 from services.shopify import Operations
 from services.inventory_repo import get_last_inventory_update,get_sales_time_range,get_sales_period
-from services.transformation import forecast_all_items, forecast_items, items_breakdown,csv_maker
+from services.transformation import forecast_items, items_breakdown,csv_maker
 from services.search import search_inventory
-from services.location_service import get_shop_locations
+from services.sync_service import prepare_sales_partitions, sync_inventory_catalog, sync_sales_window
+from services.location_service import resolve_report_location_ids
+from services.forecast_snapshot import get_report_rows, refresh_forecast_snapshot
+from services.report_pages import REPORT_PAGE_DEFAULT_LIMIT, REPORT_PAGE_MAX_LIMIT, get_report_page
+from services.report_export import EXPORT_FORMATS, iter_report_export
 from typing import Annotated
 
 router = APIRouter(prefix="/requests", tags=["requests"])
@@ -34,14 +38,24 @@ def _shop_has_sales_data(db: Session, shop_id: int, sales_duration: int) -> bool
         return False
 
     total_sales = (
-        db.query(func.coalesce(func.sum(Sales.quantity_sold), 0))
-        .filter(Sales.shop_id == shop_id)
+        db.query(func.coalesce(func.sum(SalesDaily.quantity_sold), 0))
+        .filter(SalesDaily.shop_id == shop_id)
         .scalar()
     )
 
     return float(total_sales or 0) > 0
 
 
+def _refresh_forecast(db: Session, shop_id) -> None:
+    # The sync is already committed and bumped data_version, so if this
+    # fails the old snapshot no longer matches and the report is computed live
+    try:
+        refresh_forecast_snapshot(db, shop_id)
+    except Exception:
+        traceback.print_exc()
+        db.rollback()
+
+
 
 
 @router.post("/sync/inventory")
@@ -73,29 +87,23 @@ def sync_inventory(
             host=request.headers.get("X-Shopify-Host") if request else None,
         )
 
-        inventory_rows = ops.get_inventory() or []
+        result = sync_inventory_catalog(db, ops, shop.id)
 
     except Exception:
         traceback.print_exc()
         db.rollback()
         return {"status": "error", "message": "Inventory sync failed"}
 
-    if not inventory_rows:
+    if result["mode"] == "full" and not result["rows"]:
         return {"status": "empty"}
 
-    try:
-        ops.delete_inventory(shop.id, db)
-        db.bulk_insert_mappings(Inventory, inventory_rows)
-        db.commit()
-
-    except Exception:
-        traceback.print_exc()
-        db.rollback()
-        return {"status": "error", "message": "Inventory sync failed"}
+    _refresh_forecast(db, shop.id)
 
     return {
         "status": "success",
         "message": f"Inventory synced for shop {shop.shop_domain}",
+        "mode": result["mode"],
+        "rows": result["rows"],
     }
     
     
@@ -108,6 +116,10 @@ def sync_sales(
     end_date: date = Query(...),
 ):
 
+    # Before the read below: once this transaction has touched sales,
+    # creating a partition would have to wait for it to end
+    prepare_sales_partitions(db, start_date, end_date)
+
     sales_period = get_sales_time_range(db, shop.id)
 
     if (
@@ -130,7 +142,7 @@ def sync_sales(
             host=request.headers.get("X-Shopify-Host") if request else None,
         )
 
-        sales_rows = ops.get_sales(start_date, end_date) or []
+        result = sync_sales_window(db, ops, shop.id, start_date, end_date)
 
     except Exception as exc:
         error_message = str(exc)
@@ -149,22 +161,16 @@ def sync_sales(
         db.rollback()
         return {"status": "error", "message": "Sales sync failed"}
 
-    if not sales_rows:
+    if result["mode"] == "full" and not result["rows"]:
         return {"status": "empty"}
 
-    try:
-        ops.delete_sales(shop.id, db)
-        db.bulk_insert_mappings(Sales, sales_rows)
-        db.commit()
-
-    except Exception:
-        traceback.print_exc()
-        db.rollback()
-        return {"status": "error", "message": "Sales sync failed"}
+    _refresh_forecast(db, shop.id)
 
     return {
         "status": "success",
         "message": f"Sales synced for shop {shop.shop_domain} for {start_date} → {end_date}",
+        "mode": result["mode"],
+        "rows": result["rows"],
     }
 
 
@@ -174,10 +180,23 @@ def sync_sales(
 @router.post("/report", status_code=status.HTTP_200_OK)
 def forecast_all(
     shop: Shop = Depends(get_active_shop),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     number_of_days: int = Query(..., gt=0),
     minimum_value: int = Query(..., gt=0),
+    location_id: list[int] | None = Query(None),
+    limit: int | None = Query(None, ge=1, le=REPORT_PAGE_MAX_LIMIT),
+    cursor: str | None = Query(None),
+    sort: str | None = Query(None),
+    order: str | None = Query(None, pattern="^(asc|desc)$"),
+    status_filter: list[str] | None = Query(None, alias="status"),
+    sku: str | None = Query(None),
+    title: str | None = Query(None),
 ):
+    """
+    The forecast for every variant, ordered by sales_per_day. Passing any
+    of limit, cursor, sort, order, status, sku or title switches to a
+    keyset-paginated response: {"items", "next_cursor", "limit"}.
+    """
     try:
         sales_duration = get_sales_period(db, shop.id)
 
@@ -187,15 +206,10 @@ def forecast_all(
         if not _shop_has_sales_data(db, shop.id, sales_duration):
             return _no_sales_data_response()
 
-        location_ids = get_shop_locations(db, shop.id)
-
-        if not location_ids:
-            location_ids = [
-                l[0]
-                for l in db.query(Location.id)
-                .filter(Location.shop_id == shop.id)
-                .all()
-            ]
+        try:
+            location_ids = resolve_report_location_ids(db, shop.id, location_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         if not location_ids:
             raise HTTPException(
@@ -203,12 +217,37 @@ def forecast_all(
                 detail="No locations available for this shop"
             )
 
-        rows = forecast_all_items(
-            database=db,
+        paginated = any(
+            value is not None
+            for value in (limit, cursor, sort, order, status_filter, sku, title)
+        )
+
+        if paginated:
+            try:
+                return get_report_page(
+                    db,
+                    shop,
+                    restock_days=number_of_days,
+                    minimum_value=minimum_value,
+                    sales_duration=sales_duration,
+                    location_ids=location_ids,
+                    sort=sort or "sales_per_day",
+                    descending=(order or "desc") == "desc",
+                    statuses=status_filter,
+                    sku_prefix=sku,
+                    title_prefix=title,
+                    cursor=cursor,
+                    limit=limit or REPORT_PAGE_DEFAULT_LIMIT,
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        rows = get_report_rows(
+            db,
+            shop,
             restock_days=number_of_days,
-            sales_duration=sales_duration,
             minimum_value=minimum_value,
-            shop_id=shop.id,
+            sales_duration=sales_duration,
             location_ids=location_ids,
         )
 
@@ -230,7 +269,106 @@ def forecast_all(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Forecast failed")
 
-    
 
-    
-  
+@router.post("/report/items", status_code=status.HTTP_200_OK)
+def forecast_selected_items(
+    shop: Shop = Depends(get_active_shop),
+    db: Session = Depends(get_read_db),
+    number_of_days: int = Query(..., gt=0),
+    minimum_value: int = Query(..., gt=0),
+    title: list[str] = Query(..., min_length=1),
+    location_id: list[int] | None = Query(None),
+):
+    """The report rows of the given products, classified against the whole catalog."""
+    sales_duration = get_sales_period(db, shop.id)
+
+    if not _shop_has_sales_data(db, shop.id, sales_duration):
+        return _no_sales_data_response()
+
+    try:
+        location_ids = resolve_report_location_ids(db, shop.id, location_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not location_ids:
+        raise HTTPException(status_code=400, detail="No locations available for this shop")
+
+    return forecast_items(
+        db,
+        title,
+        shop.id,
+        restock_days=number_of_days,
+        sales_duration=sales_duration,
+        minimum_value=minimum_value,
+        location_ids=location_ids,
+    )
+
+
+@router.post("/report/breakdown", status_code=status.HTTP_200_OK)
+def report_breakdown(
+    shop: Shop = Depends(get_active_shop),
+    db: Session = Depends(get_read_db),
+    number_of_days: int = Query(..., gt=0),
+    location_id: list[int] | None = Query(None),
+):
+    """Units sold per product, for products whose variants average under 15 days of stock."""
+    sales_duration = get_sales_period(db, shop.id)
+
+    if not _shop_has_sales_data(db, shop.id, sales_duration):
+        return _no_sales_data_response()
+
+    try:
+        location_ids = resolve_report_location_ids(db, shop.id, location_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not location_ids:
+        raise HTTPException(status_code=400, detail="No locations available for this shop")
+
+    return items_breakdown(
+        db,
+        shop.id,
+        restock_days=number_of_days,
+        sales_duration=sales_duration,
+        location_ids=location_ids,
+    )
+
+
+@router.get("/report/export")
+def export_report(
+    shop: Shop = Depends(get_active_shop),
+    db: Session = Depends(get_db),
+    session_factory = Depends(get_read_session_factory),
+    number_of_days: int = Query(..., gt=0),
+    minimum_value: int = Query(..., gt=0),
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    location_id: list[int] | None = Query(None),
+):
+    """The full report streamed as CSV or NDJSON, in constant memory."""
+    sales_duration = get_sales_period(db, shop.id)
+
+    if sales_duration <= 0 or not _shop_has_sales_data(db, shop.id, sales_duration):
+        raise HTTPException(status_code=404, detail="No sales data available for the selected period.")
+
+    try:
+        location_ids = resolve_report_location_ids(db, shop.id, location_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not location_ids:
+        raise HTTPException(status_code=400, detail="No locations available for this shop")
+
+    return StreamingResponse(
+        iter_report_export(
+            session_factory,
+            shop.id,
+            restock_days=number_of_days,
+            minimum_value=minimum_value,
+            sales_duration=sales_duration,
+            location_ids=location_ids,
+            export_format=export_format,
+        ),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="forecast.{export_format}"'},
+    )
+
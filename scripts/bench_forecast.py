@@ -0,0 +1,205 @@
+"""
+Parity check and benchmark: SQL forecast vs the NumPy engine.
+
+Seeds a scratch shop with a synthetic catalog (inventory over several
+locations and sales_daily rows, including returns, NULL stock and many
+tied sales rates), or takes an existing shop with --shop-id, then runs
+services.transformation.forecast_all_items_sql and
+services.forecast_engine.forecast_all_items against it. The rows must
+come back in the same order (ties broken by variant_id) with the same
+values once JSON encoded; both paths are then timed end to end (the
+NumPy time includes the aggregate query and the hop through the process
+pool).
+
+Needs a migrated database in DATABASE_URL; without one it exits with an
+error rather than checking anything.
+
+    DATABASE_URL=postgresql+psycopg2://... python -m scripts.bench_forecast --variants 100000
+    DATABASE_URL=postgresql+psycopg2://... python -m scripts.bench_forecast --shop-id <uuid>
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+
+BENCH_DOMAIN = "bench-forecast.myshopify.com"
+NUMERIC_FIELDS = ("coverage_days", "sales_per_day")
+EXACT_FIELDS = ("title", "variant_title", "sku", "inventory", "status", "restock_amount")
+
+
+def seed_shop(db, variants: int, locations: int, seed: int = 7):
+    """Replace the scratch shop's inventory and sales_daily with a synthetic catalog."""
+    from models import Inventory, SalesDaily, Shop
+    from services.sync_service import INVENTORY_COPY_COLUMNS, copy_rows
+
+    shop = db.query(Shop).filter(Shop.shop_domain == BENCH_DOMAIN).first()
+    if not shop:
+        shop = Shop(shop_domain=BENCH_DOMAIN, access_token="bench")
+        db.add(shop)
+        db.flush()
+
+    db.query(Inventory).filter(Inventory.shop_id == shop.id).delete(synchronize_session=False)
+    db.query(SalesDaily).filter(SalesDaily.shop_id == shop.id).delete(synchronize_session=False)
+
+    rng = random.Random(seed)
+    today = date.today()
+    inventory_rows = []
+    daily_rows = []
+
+    for variant_id in range(1, variants + 1):
+        for location_id in range(1, locations + 1):
+            inventory_rows.append({
+                "shop_id": shop.id,
+                "variant_id": variant_id,
+                "location_id": location_id,
+                "title": f"Product {variant_id // 4}",
+                "variant_title": f"Size {variant_id % 4}",
+                "sku": f"SKU-{variant_id}",
+                # A few unknown quantities, which SUM keeps as NULL
+                "inventory": None if rng.random() < 0.01 else rng.randint(-5, 100),
+                "price": "19.99",
+            })
+
+        # A narrow range of totals, so many variants tie on sales per day
+        sold = 0 if rng.random() < 0.3 else rng.randint(-2, 120)
+        if sold:
+            first = rng.randint(-3, sold) if sold > 0 else sold
+            for offset, quantity in enumerate((first, sold - first)):
+                if quantity:
+                    daily_rows.append({
+                        "shop_id": shop.id,
+                        "variant_id": variant_id,
+                        "day": today - timedelta(days=offset + 1),
+                        "quantity_sold": quantity,
+                    })
+
+    copy_rows(db, "inventory", INVENTORY_COPY_COLUMNS, inventory_rows)
+    copy_rows(db, "sales_daily", ("shop_id", "variant_id", "day", "quantity_sold"), daily_rows)
+    db.commit()
+
+    # The last location is left out of the report to exercise the filter
+    return shop.id, list(range(1, max(locations, 2)))
+
+
+def compare(expected: list[dict], actual: list[dict]) -> list[str]:
+    """Differences between two row lists, in order and matched by variant_id."""
+    from fastapi.encoders import jsonable_encoder
+
+    expected = jsonable_encoder(expected)
+    actual = jsonable_encoder(actual)
+    problems = []
+
+    if len(expected) != len(actual):
+        problems.append(f"row count {len(expected)} != {len(actual)}")
+
+    for position, (row, other) in enumerate(zip(expected, actual)):
+        if row["variant_id"] != other["variant_id"]:
+            problems.append(
+                f"row {position}: variant {row['variant_id']} != {other['variant_id']} "
+                f"(sales_per_day {row['sales_per_day']!r} / {other['sales_per_day']!r})"
+            )
+
+    by_variant = {row["variant_id"]: row for row in actual}
+    for row in expected:
+        other = by_variant.get(row["variant_id"])
+        if other is None:
+            problems.append(f"variant {row['variant_id']} missing")
+            continue
+        for field in EXACT_FIELDS:
+            if row[field] != other[field]:
+                problems.append(f"variant {row['variant_id']} {field}: {row[field]!r} != {other[field]!r}")
+        for field in NUMERIC_FIELDS:
+            if abs(float(row[field]) - float(other[field])) > 1e-9:
+                problems.append(f"variant {row['variant_id']} {field}: {row[field]!r} != {other[field]!r}")
+
+    return problems
+
+
+def _best_of(repeat: int, run) -> tuple[float, list]:
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _report(problems: list[str]) -> int:
+    for problem in problems[:20]:
+        print(f"[PARITY] {problem}")
+    print(f"[PARITY] {'ok' if not problems else f'{len(problems)} differences'}")
+    return 1 if problems else 0
+
+
+def run(args) -> int:
+    from db import SessionLocal
+    from services import forecast_engine
+    from services.inventory_repo import get_sales_period
+    from services.location_service import get_report_location_ids
+    from services.transformation import forecast_all_items_sql
+
+    db = SessionLocal()
+    try:
+        if args.shop_id:
+            shop_id = args.shop_id
+            location_ids = get_report_location_ids(db, shop_id)
+        else:
+            shop_id, location_ids = seed_shop(db, args.variants, args.locations)
+            print(f"[SEED] shop {shop_id}: {args.variants} variants x {args.locations} locations")
+
+        params = {
+            "database": db,
+            "restock_days": args.restock_days,
+            "sales_duration": args.sales_duration or get_sales_period(db, shop_id),
+            "minimum_value": args.minimum_value,
+            "shop_id": shop_id,
+            "location_ids": location_ids,
+        }
+
+        # Warm the pool so worker start-up is not timed
+        forecast_engine.forecast_all_items(**params)
+
+        sql_seconds, expected = _best_of(args.repeat, lambda: forecast_all_items_sql(**params))
+        numpy_seconds, actual = _best_of(args.repeat, lambda: forecast_engine.forecast_all_items(**params))
+
+        if not expected:
+            print("[PARITY] The SQL forecast returned no rows; nothing was compared")
+            return 1
+
+        failed = _report(compare(expected, actual))
+        print(
+            f"[BENCH] shop {shop_id}, {len(expected)} variants: sql {sql_seconds * 1000:,.1f} ms | "
+            f"numpy {numpy_seconds * 1000:,.1f} ms ({sql_seconds / numpy_seconds:.1f}x)"
+        )
+        return failed
+    finally:
+        db.rollback()
+        db.close()
+        forecast_engine.shutdown_pool()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variants", type=int, default=50000, help="seeded catalog size")
+    parser.add_argument("--locations", type=int, default=3, help="seeded locations per variant")
+    parser.add_argument("--shop-id", help="compare on this existing shop instead of seeding one")
+    parser.add_argument("--restock-days", type=int, default=30)
+    parser.add_argument("--sales-duration", type=int, default=90, help="0 uses the shop's sales period")
+    parser.add_argument("--minimum-value", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        print("[PARITY] DATABASE_URL is not set: parity is only checked against Postgres", file=sys.stderr)
+        return 2
+
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
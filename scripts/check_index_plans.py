@@ -0,0 +1,246 @@
+"""
+Assert that dashboard and forecast queries use their indexes.
+
+Seeds a fixture of --shops shops (--variants variants over --locations
+locations each, with --days days of sales), so the checked shop is one
+tenant among many as in production, then runs VACUUM ANALYZE so the
+planner has real statistics and visibility maps. The real service code
+then runs for the first fixture shop with the default planner settings;
+every statement it sends is captured and EXPLAINed, and the chosen plan
+must scan the expected index (an index, index-only or bitmap index
+scan). The checks run in a transaction that is rolled back, and the
+fixture shops are deleted afterwards unless --keep is given.
+
+With --shop-id an existing shop is checked instead, on the database's
+current statistics, and nothing is seeded.
+
+    DATABASE_URL=postgresql+psycopg2://... python -m scripts.check_index_plans
+    DATABASE_URL=postgresql+psycopg2://... python -m scripts.check_index_plans --shop-id <uuid>
+"""
+import argparse
+import random
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import event, text
+
+from db import SessionLocal, engine
+from models import Inventory, Sales, SalesDaily, Shop, SyncState
+from services.dashboard_services import DashboardServices
+from services.inventory_repo import get_sales_period
+from services.notification_engine import low_stock_items
+from services.sales_partitions import ensure_sales_partitions
+from services.sync_service import (
+    INVENTORY_COPY_COLUMNS,
+    SALES_COPY_COLUMNS,
+    copy_rows,
+    refresh_sales_daily,
+)
+from services.transformation import forecast_all_items, forecast_items, items_breakdown
+
+
+FIXTURE_DOMAIN = "plans-check-{}.myshopify.com"
+FIXTURE_TABLES = (Inventory.__tablename__, Sales.__tablename__, SalesDaily.__tablename__)
+
+
+def _scanned_indexes(plan: dict):
+    if plan.get("Index Name"):
+        yield plan["Index Name"]
+    for child in plan.get("Plans", []):
+        yield from _scanned_indexes(child)
+
+
+def drop_fixture(db) -> None:
+    shop_ids = [
+        row[0]
+        for row in db.query(Shop.id).filter(Shop.shop_domain.like(FIXTURE_DOMAIN.format("%"))).all()
+    ]
+    if not shop_ids:
+        return
+
+    # sales has no ON DELETE CASCADE to shops
+    for model in (Sales, SalesDaily, Inventory, SyncState):
+        db.query(model).filter(model.shop_id.in_(shop_ids)).delete(synchronize_session=False)
+    db.query(Shop).filter(Shop.id.in_(shop_ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def seed_fixture(db, shops: int, variants: int, locations: int, days: int, seed: int = 11):
+    """Commit the fixture shops and return the id of the one to check."""
+    rng = random.Random(seed)
+    today = date.today()
+    first_day = today - timedelta(days=days)
+    ensure_sales_partitions(db, first_day, today)
+
+    shop_ids = []
+    for number in range(shops):
+        shop = Shop(shop_domain=FIXTURE_DOMAIN.format(number), access_token="plans")
+        db.add(shop)
+        db.flush()
+        shop_ids.append(shop.id)
+
+        inventory_rows = []
+        sales_rows = []
+        order_id = 0
+
+        for variant_id in range(1, variants + 1):
+            for location_id in range(1, locations + 1):
+                inventory_rows.append({
+                    "shop_id": shop.id,
+                    "variant_id": variant_id,
+                    "location_id": location_id,
+                    "title": f"Product {variant_id // 4}",
+                    "variant_title": f"Size {variant_id % 4}",
+                    # Some variants have no SKU, which the KPIs leave out
+                    "sku": "" if rng.random() < 0.05 else f"SKU-{variant_id}",
+                    "inventory": rng.randint(0, 100),
+                    "price": "19.99",
+                })
+
+            for _ in range(rng.choice((0, 0, 1, 2, 4, 8))):
+                order_id += 1
+                sales_rows.append({
+                    "shop_id": shop.id,
+                    "variant_id": variant_id,
+                    "order_id": order_id,
+                    "line_item_id": order_id,
+                    "title": f"Product {variant_id // 4}",
+                    "variant_title": f"Size {variant_id % 4}",
+                    "sku": f"SKU-{variant_id}",
+                    "quantity_sold": rng.randint(1, 3),
+                    "created_at": first_day + timedelta(days=rng.randrange(days)),
+                })
+
+        copy_rows(db, Inventory.__tablename__, INVENTORY_COPY_COLUMNS, inventory_rows)
+        copy_rows(db, Sales.__tablename__, SALES_COPY_COLUMNS, sales_rows)
+        refresh_sales_daily(db, shop.id)
+        db.commit()
+
+    # Outside a transaction, as VACUUM requires; production tables get
+    # the same from autovacuum
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for table in FIXTURE_TABLES:
+            connection.exec_driver_sql(f"VACUUM ANALYZE {table}")
+
+    return shop_ids[0]
+
+
+def _parent_index(connection, name: str) -> str:
+    """Partitions of sales report their own index names; map them to the parent index."""
+    parent = connection.execute(text("""
+        SELECT parent.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE child.relname = :name AND child.relkind = 'i'
+    """), {"name": name}).scalar()
+    return parent or name
+
+
+def _checks(db, shop_id) -> list[tuple[str, object, str]]:
+    dashboard = DashboardServices(db, shop_id)
+    location_ids = [
+        row[0]
+        for row in db.query(Inventory.location_id)
+        .filter(Inventory.shop_id == shop_id)
+        .distinct()
+        .all()
+    ] or [0]
+    titles = [
+        row[0]
+        for row in db.query(Inventory.title)
+        .filter(Inventory.shop_id == shop_id, Inventory.title.isnot(None))
+        .distinct()
+        .limit(5)
+        .all()
+    ]
+
+    return [
+        ("total_sku_count", dashboard.total_sku_count, "idx_inventory_shop_sku_kpi"),
+        ("inventory_value", dashboard.inventory_value, "idx_inventory_shop_sku_kpi"),
+        ("units_in_stock", dashboard.units_in_stock, "idx_inventory_shop_sku_kpi"),
+        ("average_sales_per_day", dashboard.average_sales_per_day, "idx_sales_daily_shop_day"),
+        ("get_sales_period", lambda: get_sales_period(db, shop_id), "idx_sales_shop_date"),
+        ("refresh_sales_daily", lambda: refresh_sales_daily(db, shop_id), "idx_sales_shop_variant_date"),
+        (
+            "forecast_all_items",
+            lambda: forecast_all_items(db, 30, 30, 1, shop_id, location_ids),
+            "idx_sales_daily_shop_variant",
+        ),
+        ("low_stock_items", lambda: low_stock_items(shop_id, 30, db, 30), "idx_sales_daily_shop_variant"),
+        (
+            "forecast_items",
+            lambda: forecast_items(db, titles, shop_id, 30, 30, 1, location_ids),
+            "idx_sales_daily_shop_variant",
+        ),
+        (
+            "items_breakdown",
+            lambda: items_breakdown(db, shop_id, 30, 30, location_ids),
+            "idx_sales_daily_shop_variant",
+        ),
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shop-id", help="check this existing shop instead of seeding a fixture")
+    parser.add_argument("--shops", type=int, default=20, help="fixture shops")
+    parser.add_argument("--variants", type=int, default=5000, help="variants per fixture shop")
+    parser.add_argument("--locations", type=int, default=3, help="locations per fixture variant")
+    parser.add_argument("--days", type=int, default=180, help="days of fixture sales")
+    parser.add_argument("--keep", action="store_true", help="leave the fixture shops in place")
+    args = parser.parse_args()
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # Prepared queries are explained through their EXECUTE
+        if not statement.lstrip().upper().startswith(("SET", "EXPLAIN", "PREPARE")):
+            captured.append((statement, parameters))
+
+    db = SessionLocal()
+    failures = 0
+
+    try:
+        if args.shop_id:
+            shop_id = args.shop_id
+        else:
+            drop_fixture(db)
+            shop_id = seed_fixture(db, args.shops, args.variants, args.locations, args.days)
+            print(
+                f"[PLANS] Seeded {args.shops} shops x {args.variants} variants x {args.locations} locations, "
+                f"{args.days} days of sales; checking shop {shop_id}"
+            )
+
+        connection = db.connection()
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            for name, run, index_name in _checks(db, shop_id):
+                captured.clear()
+                run()
+                statements = list(captured)
+
+                used = set()
+                for statement, parameters in statements:
+                    plan = connection.exec_driver_sql(
+                        "EXPLAIN (FORMAT JSON) " + statement, parameters
+                    ).scalar()
+                    used.update(_parent_index(connection, index) for index in _scanned_indexes(plan[0]["Plan"]))
+
+                ok = index_name in used
+                failures += not ok
+                print(f"[PLANS] {'ok  ' if ok else 'FAIL'} {name}: expected a scan on {index_name}, got {sorted(used) or 'none'}")
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+    finally:
+        db.rollback()
+        if not args.shop_id and not args.keep:
+            drop_fixture(db)
+        db.close()
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,508 @@
+"""
+Local stand-in for the Shopify Admin GraphQL API, for benchmarking syncs.
+
+Serves a synthetic catalog (products, variants, inventory levels,
+locations, orders) generated on the fly from its index, so a 500k variant
+catalog costs no memory. Supports the queries Operations sends: cursor
+paging, aliased node() follow-ups, counts, incremental updated_at
+filters, bulk operations with a JSONL download, cost/throttleStatus
+extensions with THROTTLED errors, and per-request latency.
+
+Recorded responses can be replayed with --fixtures: a JSONL file of
+{"match": "<query substring>", "responses": [<body>, ...]} entries; a
+request whose query contains `match` gets the next body (the last one
+repeats) instead of the synthetic answer.
+
+    python -m scripts.fake_shopify --variants 100000 --latency-ms 50
+    SHOPIFY_ADMIN_BASE_URL=http://127.0.0.1:8765 uvicorn main:app
+"""
+import argparse
+import itertools
+import json
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+CONNECTION_PAGE = 50
+LEVELS_PAGE = 10
+CHUNK_LINES = 1000
+
+
+@dataclass
+class Catalog:
+    variants: int = 1000
+    variants_per_product: int = 5
+    locations: int = 3
+    orders_per_day: int = 20
+    line_items_per_order: int = 3
+    history_days: int = 365
+    # One product / inventory level in `changed_every` matches an updated_at filter
+    changed_every: int = 100
+
+    @property
+    def products(self) -> int:
+        return math.ceil(self.variants / self.variants_per_product)
+
+    @property
+    def first_day(self) -> date:
+        return datetime.now(timezone.utc).date() - timedelta(days=self.history_days - 1)
+
+
+def _gid(kind: str, value: int) -> str:
+    return f"gid://shopify/{kind}/{value}"
+
+
+def _gid_parts(gid: str) -> tuple[str, int]:
+    kind, _, value = gid.rpartition("/")
+    return kind.rpartition("/")[2], int(value)
+
+
+def _page(start: int, stop: int, offset: int, first: int) -> tuple[range, dict]:
+    """Slice start..stop at `offset` (the cursor) and build its pageInfo."""
+    lo = start + offset
+    hi = min(stop, lo + first)
+    has_next = hi < stop
+    return range(lo, hi), {"hasNextPage": has_next, "endCursor": str(hi - start) if has_next else None}
+
+
+def _offset(cursor) -> int:
+    return int(cursor) if cursor else 0
+
+
+class FakeShopify:
+    def __init__(
+        self,
+        catalog: Catalog,
+        latency: float = 0.0,
+        maximum_available: float = 2000.0,
+        restore_rate: float = 100.0,
+        bulk_polls: int = 1,
+        fixtures: list[dict] | None = None,
+    ):
+        self.catalog = catalog
+        self.latency = latency
+        self.maximum_available = maximum_available
+        self.restore_rate = restore_rate
+        self.available = maximum_available
+        self.refilled_at = time.monotonic()
+        self.bulk_polls = bulk_polls
+        self.fixtures = [(entry["match"], list(entry["responses"])) for entry in fixtures or []]
+        self.bulk_operations = {}
+        self.bulk_ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.base_url = ""
+
+    # ---------- Catalog ----------
+    def level_node(self, variant: int, location: int, with_variant: bool = False) -> dict:
+        node = {
+            "quantities": [{"name": "available", "quantity": (variant * 31 + location * 7) % 50}],
+            "location": {"id": _gid("Location", location), "name": f"Location {location}"},
+        }
+        if with_variant:
+            variant_node = self.variant_fields(variant)
+            variant_node["product"] = {"title": self.product_title(variant // self.catalog.variants_per_product)}
+            node["item"] = {"variant": variant_node}
+        return node
+
+    def levels(self, variant: int, offset: int = 0, first: int = LEVELS_PAGE) -> dict:
+        indices, page_info = _page(1, self.catalog.locations + 1, offset, first)
+        return {
+            "edges": [{"node": self.level_node(variant, location)} for location in indices],
+            "pageInfo": page_info,
+        }
+
+    def product_title(self, product: int) -> str:
+        return f"Product {product}"
+
+    def variant_fields(self, variant: int) -> dict:
+        return {
+            "id": _gid("ProductVariant", variant),
+            "sku": f"SKU-{variant:07d}",
+            "title": f"Option {variant % self.catalog.variants_per_product}",
+            "price": f"{10 + variant % 90}.00",
+        }
+
+    def variant_node(self, variant: int) -> dict:
+        node = self.variant_fields(variant)
+        node["inventoryItem"] = {"id": _gid("InventoryItem", variant), "inventoryLevels": self.levels(variant)}
+        return node
+
+    def product_variants(self, product: int) -> tuple[int, int]:
+        start = product * self.catalog.variants_per_product
+        return start, min(start + self.catalog.variants_per_product, self.catalog.variants)
+
+    def variants(self, product: int, offset: int = 0, first: int = CONNECTION_PAGE) -> dict:
+        indices, page_info = _page(*self.product_variants(product), offset, first)
+        return {"edges": [{"node": self.variant_node(variant)} for variant in indices], "pageInfo": page_info}
+
+    def product_node(self, product: int) -> dict:
+        return {"id": _gid("Product", product), "title": self.product_title(product), "variants": self.variants(product)}
+
+    def order_day(self, order: int) -> date:
+        return self.catalog.first_day + timedelta(days=(order - 1) // self.catalog.orders_per_day)
+
+    def order_times(self, order: int) -> tuple[str, str]:
+        day = self.order_day(order).isoformat()
+        return f"{day}T10:00:00Z", f"{day}T11:00:00Z"
+
+    def line_item(self, order: int, index: int) -> dict:
+        variant = (order * 7 + index) % self.catalog.variants
+        node = self.variant_fields(variant)
+        node["product"] = {"title": self.product_title(variant // self.catalog.variants_per_product)}
+        return {
+            "id": _gid("LineItem", order * 1000 + index),
+            "title": node["product"]["title"],
+            "quantity": 1 + index % 3,
+            "variant": node,
+        }
+
+    def line_items(self, order: int, offset: int = 0, first: int = CONNECTION_PAGE) -> dict:
+        indices, page_info = _page(0, self.catalog.line_items_per_order, offset, first)
+        return {"edges": [{"node": self.line_item(order, index)} for index in indices], "pageInfo": page_info}
+
+    def order_node(self, order: int) -> dict:
+        created_at, updated_at = self.order_times(order)
+        return {
+            "id": _gid("Order", order),
+            "createdAt": created_at,
+            "updatedAt": updated_at,
+            "lineItems": self.line_items(order),
+        }
+
+    def order_range(self, search: str) -> range:
+        """Order numbers matching an orders search; orders are numbered by creation day."""
+        catalog = self.catalog
+        first_day, last_day = 0, catalog.history_days - 1
+
+        created_from = re.search(r"created_at:>=(\d{4}-\d{2}-\d{2})", search)
+        created_to = re.search(r"created_at:<=(\d{4}-\d{2}-\d{2})", search)
+        updated_from = re.search(r"updated_at:>='([^']+)'", search)
+
+        if created_from:
+            first_day = max(first_day, (date.fromisoformat(created_from.group(1)) - catalog.first_day).days)
+        if created_to:
+            last_day = min(last_day, (date.fromisoformat(created_to.group(1)) - catalog.first_day).days)
+        if updated_from:
+            since = datetime.fromisoformat(updated_from.group(1))
+            first_updated = datetime.combine(catalog.first_day, datetime.min.time(), tzinfo=timezone.utc) + timedelta(hours=11)
+            first_day = max(first_day, math.ceil((since - first_updated) / timedelta(days=1)))
+
+        if last_day < first_day:
+            return range(0)
+        return range(first_day * catalog.orders_per_day + 1, (last_day + 1) * catalog.orders_per_day + 1)
+
+    # ---------- Queries ----------
+    def products(self, variables: dict) -> dict:
+        products = range(self.catalog.products)
+        if variables.get("query"):
+            products = products[::self.catalog.changed_every]
+
+        indices, page_info = _page(0, len(products), _offset(variables.get("cursor")), variables.get("first") or CONNECTION_PAGE)
+        return {"products": {
+            "edges": [{"node": self.product_node(products[index])} for index in indices],
+            "pageInfo": page_info,
+        }}
+
+    def location_levels(self, variables: dict) -> dict:
+        _, location = _gid_parts(variables["id"])
+        variants = range(self.catalog.variants)
+        if variables.get("query"):
+            variants = variants[1::self.catalog.changed_every]
+
+        indices, page_info = _page(0, len(variants), _offset(variables.get("cursor")), variables.get("first") or CONNECTION_PAGE)
+        return {"location": {"inventoryLevels": {
+            "edges": [{"node": self.level_node(variants[index], location, with_variant=True)} for index in indices],
+            "pageInfo": page_info,
+        }}}
+
+    def locations(self, variables: dict) -> dict:
+        indices, page_info = _page(1, self.catalog.locations + 1, _offset(variables.get("cursor")), 250)
+        return {"locations": {
+            "edges": [{"node": {"id": _gid("Location", location), "name": f"Location {location}"}} for location in indices],
+            "pageInfo": page_info,
+        }}
+
+    def orders(self, variables: dict) -> dict:
+        orders = self.order_range(variables.get("query") or "")
+        indices, page_info = _page(0, len(orders), _offset(variables.get("cursor")), variables.get("first") or CONNECTION_PAGE)
+        return {"orders": {
+            "edges": [{"node": self.order_node(orders[index])} for index in indices],
+            "pageInfo": page_info,
+        }}
+
+    def follow_ups(self, variables: dict) -> dict:
+        data = {}
+        for index in itertools.count():
+            gid = variables.get(f"id{index}")
+            if gid is None:
+                break
+
+            kind, value = _gid_parts(gid)
+            offset = _offset(variables.get(f"after{index}"))
+            if kind == "Product":
+                data[f"n{index}"] = {"variants": self.variants(value, offset)}
+            elif kind == "InventoryItem":
+                data[f"n{index}"] = {"inventoryLevels": self.levels(value, offset, CONNECTION_PAGE)}
+            elif kind == "Order":
+                data[f"n{index}"] = {"lineItems": self.line_items(value, offset)}
+            else:
+                data[f"n{index}"] = None
+        return data
+
+    # ---------- Bulk operations ----------
+    def run_bulk(self, variables: dict) -> dict:
+        operation_id = _gid("BulkOperation", next(self.bulk_ids))
+        self.bulk_operations[operation_id] = {"query": variables["query"], "polls": 0}
+        return {"bulkOperationRunQuery": {
+            "bulkOperation": {"id": operation_id, "status": "CREATED"},
+            "userErrors": [],
+        }}
+
+    def bulk_status(self, variables: dict) -> dict:
+        operation_id = variables["id"]
+        operation = self.bulk_operations.get(operation_id)
+        if operation is None:
+            return {"node": None}
+
+        operation["polls"] += 1
+        if operation["polls"] <= self.bulk_polls:
+            return {"node": {"id": operation_id, "status": "RUNNING", "errorCode": None, "objectCount": "0", "url": None}}
+
+        _, number = _gid_parts(operation_id)
+        return {"node": {
+            "id": operation_id,
+            "status": "COMPLETED",
+            "errorCode": None,
+            "objectCount": str(self.bulk_object_count(operation["query"])),
+            "url": f"{self.base_url}/bulk/{number}.jsonl",
+        }}
+
+    def bulk_object_count(self, query: str) -> int:
+        if "orders" in query:
+            return len(self.order_range(query)) * (1 + self.catalog.line_items_per_order)
+        return self.catalog.products + self.catalog.variants * (1 + self.catalog.locations)
+
+    def bulk_records(self, query: str):
+        if "orders" in query:
+            for order in self.order_range(query):
+                created_at, updated_at = self.order_times(order)
+                order_id = _gid("Order", order)
+                yield {"id": order_id, "createdAt": created_at, "updatedAt": updated_at}
+                for index in range(self.catalog.line_items_per_order):
+                    item = self.line_item(order, index)
+                    item["__parentId"] = order_id
+                    yield item
+            return
+
+        for product in range(self.catalog.products):
+            product_id = _gid("Product", product)
+            yield {"id": product_id, "title": self.product_title(product)}
+            for variant in range(*self.product_variants(product)):
+                variant_node = self.variant_fields(variant)
+                variant_node["inventoryItem"] = {"id": _gid("InventoryItem", variant)}
+                variant_node["__parentId"] = product_id
+                yield variant_node
+                for location in range(1, self.catalog.locations + 1):
+                    level = self.level_node(variant, location)
+                    level["id"] = _gid("InventoryLevel", variant * 1000 + location)
+                    level["__parentId"] = variant_node["id"]
+                    yield level
+
+    # ---------- Dispatch ----------
+    def fixture(self, query: str):
+        for match, responses in self.fixtures:
+            if match in query:
+                return responses.pop(0) if len(responses) > 1 else responses[0]
+        return None
+
+    def resolve(self, query: str, variables: dict) -> dict:
+        if "bulkOperationRunQuery" in query:
+            return self.run_bulk(variables)
+        if "on BulkOperation" in query:
+            return self.bulk_status(variables)
+        if "productVariantsCount" in query:
+            return {"productVariantsCount": {"count": self.catalog.variants, "precision": "EXACT"}}
+        if "ordersCount" in query:
+            return {"ordersCount": {"count": len(self.order_range(variables.get("query") or "")), "precision": "EXACT"}}
+        if "n0: node(" in query:
+            return self.follow_ups(variables)
+        if "location(id:" in query:
+            return self.location_levels(variables)
+        if "locations(" in query:
+            return self.locations(variables)
+        if "products(" in query:
+            return self.products(variables)
+        if "orders(" in query:
+            return self.orders(variables)
+        raise ValueError("unsupported query")
+
+    def _spend(self, cost: float) -> dict | None:
+        """Charge the leaky bucket; returns throttleStatus, or None when throttled."""
+        with self.lock:
+            now = time.monotonic()
+            self.available = min(self.maximum_available, self.available + (now - self.refilled_at) * self.restore_rate)
+            self.refilled_at = now
+
+            throttled = self.available < cost
+            if not throttled:
+                self.available -= cost
+
+            status = {
+                "maximumAvailable": self.maximum_available,
+                "currentlyAvailable": self.available,
+                "restoreRate": self.restore_rate,
+            }
+        return None if throttled else status
+
+    def graphql(self, body: dict) -> dict:
+        if self.latency:
+            time.sleep(self.latency)
+
+        query = body.get("query") or ""
+        variables = body.get("variables") or {}
+
+        response = self.fixture(query)
+        if response is not None:
+            return response
+
+        try:
+            data = self.resolve(query, variables)
+        except (KeyError, ValueError) as exc:
+            return {"errors": [{"message": f"fake_shopify: {exc}"}]}
+
+        cost = min(1000, 1 + _count_nodes(data))
+        status = self._spend(cost)
+        if status is None:
+            return {
+                "errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}],
+                "extensions": {"cost": {"requestedQueryCost": cost, "throttleStatus": self._spend(0)}},
+            }
+
+        return {
+            "data": data,
+            "extensions": {"cost": {
+                "requestedQueryCost": cost,
+                "actualQueryCost": cost,
+                "throttleStatus": status,
+            }},
+        }
+
+
+def _count_nodes(value) -> int:
+    if isinstance(value, dict):
+        return sum(_count_nodes(item) for key, item in value.items() if key != "pageInfo") + ("edges" in value)
+    if isinstance(value, list):
+        return len(value) + sum(_count_nodes(item) for item in value)
+    return 0
+
+
+def make_handler(shop: FakeShopify):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            if not self.path.endswith("/graphql.json"):
+                self._send_json(404, {"errors": "Not Found"})
+                return
+
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            self._send_json(200, shop.graphql(body))
+
+        def do_GET(self):
+            match = re.fullmatch(r"/bulk/(\d+)\.jsonl", self.path)
+            operation = match and shop.bulk_operations.get(_gid("BulkOperation", int(match.group(1))))
+            if not operation:
+                self._send_json(404, {"errors": "Not Found"})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/jsonl")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            records = shop.bulk_records(operation["query"])
+            while True:
+                lines = [json.dumps(record) for record in itertools.islice(records, CHUNK_LINES)]
+                if not lines:
+                    break
+                chunk = ("\n".join(lines) + "\n").encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+def start(shop: FakeShopify, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve `shop` on a daemon thread; shop.base_url holds the address."""
+    server = ThreadingHTTPServer((host, port), make_handler(shop))
+    server.daemon_threads = True
+    shop.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    parser.add_argument("--variants", type=int, default=1000)
+    parser.add_argument("--variants-per-product", type=int, default=5)
+    parser.add_argument("--locations", type=int, default=3)
+    parser.add_argument("--orders-per-day", type=int, default=20)
+    parser.add_argument("--line-items", type=int, default=3)
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--maximum-available", type=float, default=2000.0)
+    parser.add_argument("--restore-rate", type=float, default=100.0)
+    parser.add_argument("--bulk-polls", type=int, default=1, help="RUNNING polls before a bulk operation completes")
+    parser.add_argument("--fixtures", type=Path, help="JSONL of recorded responses to replay")
+    args = parser.parse_args()
+
+    fixtures = None
+    if args.fixtures:
+        fixtures = [json.loads(line) for line in args.fixtures.read_text().splitlines() if line.strip()]
+
+    shop = FakeShopify(
+        Catalog(
+            variants=args.variants,
+            variants_per_product=args.variants_per_product,
+            locations=args.locations,
+            orders_per_day=args.orders_per_day,
+            line_items_per_order=args.line_items,
+            history_days=args.history_days,
+        ),
+        latency=args.latency_ms / 1000,
+        maximum_available=args.maximum_available,
+        restore_rate=args.restore_rate,
+        bulk_polls=args.bulk_polls,
+        fixtures=fixtures,
+    )
+    server = start(shop, args.host, args.port)
+    print(f"[FAKE SHOPIFY] listening on {shop.base_url}", flush=True)
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
 
 from sqlalchemy import func
-from models import Inventory, Sales
+from models import Inventory, SalesDaily
 from sqlalchemy.orm import Session
-from .inventory_repo import get_sales_period
 
 
 class DashboardServices:
@@ -42,14 +41,21 @@ class DashboardServices:
 
     def average_sales_per_day(self) -> float:
         total_sales_row = (
-            self.data_base.query(func.coalesce(func.sum(Sales.quantity_sold), 0))
-            .filter(Sales.shop_id == self.shop_id)
+            self.data_base.query(
+                func.coalesce(func.sum(SalesDaily.quantity_sold), 0),
+                func.min(SalesDaily.day),
+                func.max(SalesDaily.day),
+            )
+            .filter(SalesDaily.shop_id == self.shop_id)
             .first()
         )
-        total_sales = self._to_number(total_sales_row[0] if total_sales_row else 0)
+        if not total_sales_row:
+            return 0.0
+
+        total_sales, first_day, last_day = total_sales_row
+        total_sales = self._to_number(total_sales)
 
-        total_days_raw = get_sales_period(self.data_base, self.shop_id)
-        total_days = self._to_number(total_days_raw)
+        total_days = (last_day - first_day).days if first_day and last_day else 0
         if not total_days or total_days == 0:
             return 0.0
 
@@ -82,7 +88,7 @@ class DashboardServices:
         total_inventory_row = (
             self.data_base.query(func.sum(Inventory.inventory))
             .filter(Inventory.shop_id == self.shop_id).filter(Inventory.sku.isnot(None))
-            .filter(Inventory.sku.isnot(""))
+            .filter(Inventory.sku != "")
             .first()
         )
         total_inventory = self._to_number(total_inventory_row[0] if total_inventory_row else 0)
@@ -0,0 +1,255 @@
+"""
+NumPy implementation of forecast_all_items.
+
+Postgres only returns the per-variant aggregates (inventory summed over
+the selected locations, units sold from sales_daily); coverage, sales
+per day, restock amounts and the quartile status are computed here on
+columnar arrays, in a worker process so request threads keep the GIL.
+
+Rows match services.transformation.forecast_all_items_sql, in the same
+order, once both are JSON encoded (the SQL path returns Decimals, this one floats and ints).
+Nothing in this module imports the app's models or engine, so spawned
+workers start cheaply.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from decimal import ROUND_CEILING, ROUND_HALF_UP, Decimal, localcontext
+import multiprocessing
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from core.config import FORECAST_ENGINE_WORKERS
+
+
+FORECAST_INPUTS_SQL = text("""
+    WITH sales2 AS (
+        SELECT variant_id, SUM(quantity_sold) AS net_items_sold
+        FROM sales_daily
+        WHERE shop_id = :shop_id
+        GROUP BY variant_id
+    )
+    SELECT
+        i.variant_id,
+        MAX(i.title) AS title,
+        MAX(i.variant_title) AS variant_title,
+        MAX(i.sku) AS sku,
+        SUM(i.inventory) AS inventory,
+        COALESCE(MAX(s.net_items_sold), 0) AS net_items_sold
+    FROM inventory i
+    LEFT JOIN sales2 s ON s.variant_id = i.variant_id
+    WHERE i.shop_id = :shop_id
+      AND i.location_id = ANY(:location_ids)
+    GROUP BY i.variant_id
+""")
+
+# Postgres numeric division keeps at least this many significant digits
+NUMERIC_MIN_SIG_DIGITS = 16
+# Float results this close to a rounding edge are recomputed exactly
+EDGE_TOLERANCE = 1e-6
+
+_pool = None
+
+
+def fetch_forecast_inputs(
+    database: Session,
+    shop_id,
+    location_ids: list[int],
+) -> dict:
+    """Per-variant aggregates as columns: lists for text, arrays for numbers."""
+    rows = database.execute(
+        FORECAST_INPUTS_SQL,
+        {"shop_id": shop_id, "location_ids": location_ids},
+    ).all()
+
+    variant_ids, titles, variant_titles, skus, inventory, sold = (
+        zip(*rows) if rows else ((), (), (), (), (), ())
+    )
+
+    return {
+        "variant_id": list(variant_ids),
+        "title": list(titles),
+        "variant_title": list(variant_titles),
+        "sku": list(skus),
+        # NaN marks a NULL inventory sum, which the SQL path keeps as NULL
+        "inventory": np.array([np.nan if value is None else value for value in inventory], dtype=np.float64),
+        "net_items_sold": np.array(sold, dtype=np.int64),
+    }
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    # Postgres ROUND(numeric, 2) rounds half away from zero, np.round to even
+    return np.sign(values) * np.floor(np.abs(values) * 100 + 0.5) / 100
+
+
+def _numeric_weight(value: Decimal) -> tuple[int, int]:
+    """Weight and leading digit of a nonzero value in Postgres' base-10000 numeric."""
+    weight = value.copy_abs().adjusted() // 4
+    return weight, int(value.copy_abs().scaleb(-4 * weight))
+
+
+def _numeric_scale(value: Decimal) -> int:
+    return max(-value.as_tuple().exponent, 0)
+
+
+def sql_divide(dividend: Decimal, divisor: Decimal) -> Decimal:
+    """
+    numeric / numeric exactly as Postgres computes it: rounded half away
+    from zero to the scale select_div_scale() picks for these operands.
+    """
+    weight1, first1 = _numeric_weight(dividend) if dividend else (0, 0)
+    weight2, first2 = _numeric_weight(divisor)
+    quotient_weight = weight1 - weight2 - (first1 < first2)
+    scale = max(
+        NUMERIC_MIN_SIG_DIGITS - quotient_weight * 4,
+        _numeric_scale(dividend),
+        _numeric_scale(divisor),
+        0,
+    )
+
+    with localcontext() as context:
+        context.prec = 200
+        return (dividend / divisor).quantize(Decimal(1).scaleb(-scale), ROUND_HALF_UP)
+
+
+def sql_coverage(inventory: int, sold: int, sales_duration: int) -> Decimal:
+    """ROUND(inventory / (sold::numeric / sales_duration), 2), before GREATEST."""
+    sales_per_day = sql_divide(Decimal(sold), Decimal(sales_duration))
+    return sql_divide(Decimal(inventory), sales_per_day).quantize(Decimal("0.01"), ROUND_HALF_UP)
+
+
+def sql_restock(inventory: int, sold: int, sales_duration: int, restock_days: int) -> Decimal:
+    """CEIL(GREATEST(sales_per_day * restock_days - inventory, 0)) for a sold variant."""
+    sales_per_day = (
+        sql_divide(Decimal(sold), Decimal(sales_duration)) if sales_duration > 0 else Decimal(0)
+    )
+    return max(sales_per_day * restock_days - inventory, Decimal(0)).to_integral_value(ROUND_CEILING)
+
+
+def compute_forecast(
+    columns: dict,
+    restock_days: int,
+    sales_duration: int,
+    minimum_value: int,
+) -> list[dict]:
+    """Same columns, statuses and order as the SQL forecast, from fetch_forecast_inputs output."""
+    inventory = columns["inventory"]
+    sold = columns["net_items_sold"]
+    count = len(sold)
+
+    if not count:
+        return []
+
+    never_sold = sold == 0
+    has_rate = ~never_sold & (sales_duration > 0)
+    safe_sold = np.where(never_sold, 1, sold)
+    known_inventory = ~np.isnan(inventory)
+    stock = np.where(known_inventory, inventory, 0)
+
+    sales_per_day = np.where(has_rate, sold / max(sales_duration, 1), 0.0)
+
+    # inventory / (sold / duration), rearranged to divide once
+    exact_coverage = stock * sales_duration / safe_sold
+    coverage = np.where(has_rate, _round2(exact_coverage), 0.0)
+
+    demand = np.where(has_rate, sold * restock_days / max(sales_duration, 1), 0.0)
+    shortfall = demand - stock
+    restock = np.where(known_inventory, np.ceil(np.maximum(shortfall, 0)), 0.0)
+
+    # Postgres rounds sold / duration to ~16 digits before going on, which
+    # decides exact .xx5 ties and whole-number shortfalls; redo those rows
+    cents = np.abs(exact_coverage) * 100
+    coverage_edges = np.flatnonzero(
+        has_rate & known_inventory & (np.abs(cents - np.floor(cents) - 0.5) < EDGE_TOLERANCE)
+    )
+    restock_edges = np.flatnonzero(
+        ~never_sold & known_inventory & (np.abs(shortfall - np.round(shortfall)) < EDGE_TOLERANCE)
+    )
+    for index in coverage_edges.tolist():
+        coverage[index] = float(sql_coverage(int(stock[index]), int(sold[index]), sales_duration))
+    for index in restock_edges.tolist():
+        restock[index] = float(sql_restock(int(stock[index]), int(sold[index]), sales_duration, restock_days))
+
+    coverage = np.where(known_inventory, np.maximum(coverage, 0), 0.0)
+    restock = np.where(never_sold, minimum_value, restock)
+
+    sold_rates = sales_per_day[sold > 0]
+    if sold_rates.size:
+        # percentile_cont interpolates linearly, as np.percentile does
+        q2, q3 = np.percentile(sold_rates, [50, 75])
+    else:
+        q2 = q3 = np.nan
+
+    status = np.select(
+        [
+            never_sold,
+            known_inventory & (inventory == 0) & (sold > 0),
+            sales_per_day > q3,
+            sales_per_day >= q2,
+        ],
+        ["never sold", "stock out", "fast moving", "moderate"],
+        default="slow moving",
+    )
+
+    rounded_rate = _round2(sales_per_day)
+    # ORDER BY unrounded_sales_per_day DESC, variant_id
+    order = np.lexsort((np.asarray(columns["variant_id"]), -sales_per_day))
+
+    return [
+        {
+            "variant_id": columns["variant_id"][index],
+            "title": columns["title"][index],
+            "variant_title": columns["variant_title"][index],
+            "sku": columns["sku"][index],
+            "coverage_days": float(coverage[index]),
+            "sales_per_day": float(rounded_rate[index]),
+            "inventory": int(inventory[index]) if known_inventory[index] else None,
+            "status": str(status[index]),
+            "restock_amount": int(restock[index]),
+        }
+        for index in order.tolist()
+    ]
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+
+    if _pool is None:
+        # Spawned rather than forked: the parent runs threads and open sockets
+        _pool = ProcessPoolExecutor(
+            max_workers=FORECAST_ENGINE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def forecast_all_items(
+    database: Session,
+    restock_days: int,
+    sales_duration: int,
+    minimum_value: int,
+    shop_id,
+    location_ids: list[int],
+) -> list[dict]:
+    columns = fetch_forecast_inputs(database, shop_id, location_ids)
+
+    if not columns["variant_id"]:
+        return []
+
+    future = _get_pool().submit(
+        compute_forecast,
+        columns,
+        restock_days,
+        sales_duration,
+        minimum_value,
+    )
+    return future.result()
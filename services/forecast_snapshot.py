@@ -0,0 +1,185 @@
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from core.config import (
+    REPORT_CACHE_MAX_BYTES,
+    REPORT_CACHE_MAX_ENTRIES,
+    REPORT_CACHE_WAIT_SECONDS,
+    REPORT_DEFAULT_MINIMUM_VALUE,
+    REPORT_DEFAULT_RESTOCK_DAYS,
+)
+from core.result_cache import ResultCache
+from models import ForecastSnapshot, Shop
+from services.inventory_repo import get_sales_period
+from services.location_service import get_report_location_ids
+from services.transformation import forecast_all_items
+
+
+report_cache = ResultCache(REPORT_CACHE_MAX_ENTRIES, REPORT_CACHE_MAX_BYTES, REPORT_CACHE_WAIT_SECONDS)
+
+
+def get_data_version(db: Session, shop_id) -> int:
+    """
+    The shop's data_version as seen by `db`. Cache keys read it from the
+    session that reads the rows, so rows from a lagging replica are
+    filed under the version they were read at rather than the primary's.
+    """
+    return db.query(Shop.data_version).filter(Shop.id == shop_id).scalar() or 0
+
+
+def get_forecast_snapshot(
+    db: Session,
+    shop_id,
+    restock_days: int,
+    minimum_value: int,
+    sales_duration: int,
+    location_ids: list[int],
+) -> list | None:
+    """
+    Stored report rows when they were computed from exactly these inputs
+    and the shop's current data, else None.
+    """
+    snapshot = db.get(ForecastSnapshot, shop_id)
+    data_version = get_data_version(db, shop_id)
+
+    if not _snapshot_matches(snapshot, data_version, restock_days, minimum_value, sales_duration, location_ids):
+        return None
+
+    return snapshot.rows
+
+
+def has_forecast_snapshot(
+    db: Session,
+    shop_id,
+    restock_days: int,
+    minimum_value: int,
+    sales_duration: int,
+    location_ids: list[int],
+) -> bool:
+    """Like get_forecast_snapshot, without loading the rows."""
+    snapshot = (
+        db.query(
+            ForecastSnapshot.data_version,
+            ForecastSnapshot.restock_days,
+            ForecastSnapshot.minimum_value,
+            ForecastSnapshot.sales_duration,
+            ForecastSnapshot.location_ids,
+            Shop.data_version.label("shop_data_version"),
+        )
+        .join(Shop, Shop.id == ForecastSnapshot.shop_id)
+        .filter(ForecastSnapshot.shop_id == shop_id)
+        .first()
+    )
+
+    return bool(snapshot) and _snapshot_matches(
+        snapshot, snapshot.shop_data_version, restock_days, minimum_value, sales_duration, location_ids
+    )
+
+
+def _snapshot_matches(snapshot, data_version, restock_days, minimum_value, sales_duration, location_ids) -> bool:
+    # A refresh that failed leaves the previous snapshot behind; its
+    # data_version no longer matches once the sync bumped the shop's
+    return bool(
+        snapshot
+        and snapshot.data_version == data_version
+        and snapshot.restock_days == restock_days
+        and snapshot.minimum_value == minimum_value
+        and snapshot.sales_duration == sales_duration
+        and list(snapshot.location_ids) == sorted(location_ids)
+    )
+
+
+def refresh_forecast_snapshot(
+    db: Session,
+    shop_id,
+    restock_days: int = REPORT_DEFAULT_RESTOCK_DAYS,
+    minimum_value: int = REPORT_DEFAULT_MINIMUM_VALUE,
+) -> None:
+    """
+    Recompute the shop's report for the default parameters once its data
+    changed. The snapshot is dropped when there is nothing to report on.
+    It records the data_version it was computed at, read in the same
+    transaction as the rows.
+    """
+    data_version = get_data_version(db, shop_id)
+    sales_duration = get_sales_period(db, shop_id)
+    location_ids = sorted(get_report_location_ids(db, shop_id))
+    snapshot = db.get(ForecastSnapshot, shop_id)
+
+    if sales_duration <= 0 or not location_ids:
+        if snapshot:
+            db.delete(snapshot)
+            db.commit()
+        return
+
+    rows = forecast_all_items(
+        database=db,
+        restock_days=restock_days,
+        sales_duration=sales_duration,
+        minimum_value=minimum_value,
+        shop_id=shop_id,
+        location_ids=location_ids,
+    )
+
+    if not snapshot:
+        snapshot = ForecastSnapshot(shop_id=shop_id)
+        db.add(snapshot)
+
+    snapshot.data_version = data_version
+    snapshot.restock_days = restock_days
+    snapshot.minimum_value = minimum_value
+    snapshot.sales_duration = sales_duration
+    snapshot.location_ids = location_ids
+    # Stored the way the endpoint would serialize them (Decimal -> number)
+    snapshot.rows = jsonable_encoder(rows)
+    snapshot.computed_at = datetime.now(timezone.utc)
+    db.commit()
+
+
+def get_report_rows(
+    db: Session,
+    shop: Shop,
+    restock_days: int,
+    minimum_value: int,
+    sales_duration: int,
+    location_ids: list[int],
+) -> list:
+    """
+    Report rows from the process-local cache, else the snapshot, else
+    computed live. Entries are keyed by the shop's data_version, so a
+    sync or location change makes every older entry unreachable.
+    """
+    key = (
+        shop.id,
+        get_data_version(db, shop.id),
+        restock_days,
+        minimum_value,
+        sales_duration,
+        tuple(sorted(location_ids)),
+    )
+
+    def compute() -> list:
+        rows = get_forecast_snapshot(
+            db,
+            shop.id,
+            restock_days=restock_days,
+            minimum_value=minimum_value,
+            sales_duration=sales_duration,
+            location_ids=location_ids,
+        )
+
+        if rows is None:
+            rows = forecast_all_items(
+                database=db,
+                restock_days=restock_days,
+                sales_duration=sales_duration,
+                minimum_value=minimum_value,
+                shop_id=shop.id,
+                location_ids=location_ids,
+            )
+
+        return rows
+
+    return report_cache.get_or_compute(key, compute)
@@ -1,16 +1,23 @@
 
 from sqlalchemy import func
-from models import Inventory, Sales
+from models import INVENTORY_RESOURCE, Inventory, Sales, SyncState
 from sqlalchemy.orm import Session
 
 
 def get_last_inventory_update(data_base : Session, shop_id: int):
-    return (
-        data_base.query(func.max(Inventory.created_at))
+    # A full sync no longer rewrites unchanged rows, so the sync state
+    # records when inventory was last refreshed.
+    synced_at = (
+        data_base.query(SyncState.synced_at)
+        .filter(SyncState.shop_id == shop_id, SyncState.resource == INVENTORY_RESOURCE)
+        .scalar()
+    )
+    row_updated_at = (
+        data_base.query(func.max(func.coalesce(Inventory.updated_at, Inventory.created_at)))
         .filter(Inventory.shop_id == shop_id)
         .scalar()
-    
     )
+    return max((value for value in (synced_at, row_updated_at) if value), default=None)
     
 def get_sales_time_range(database: Session, shop_id: int):
     result = (
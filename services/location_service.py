@@ -1,5 +1,6 @@
-from models import ShopLocationPreference
+from models import Location, ShopLocationPreference
 from sqlalchemy.orm import Session
+from services.sync_service import bump_data_version
 
 
 def set_shop_locations(db: Session, shop_id, location_ids: list[int]):
@@ -12,6 +13,7 @@ def set_shop_locations(db: Session, shop_id, location_ids: list[int]):
         [{"shop_id": shop_id, "location_id": lid} for lid in location_ids]
     )
 
+    bump_data_version(db, shop_id)
     db.commit()
 
 def get_shop_locations(db: Session, shop_id):
@@ -21,3 +23,40 @@ def get_shop_locations(db: Session, shop_id):
 
     return [r[0] for r in rows]
 
+
+def get_report_location_ids(db: Session, shop_id):
+    """Preferred locations, or every synced location when none are chosen."""
+    location_ids = get_shop_locations(db, shop_id)
+
+    if not location_ids:
+        location_ids = [
+            l[0]
+            for l in db.query(Location.id)
+            .filter(Location.shop_id == shop_id)
+            .all()
+        ]
+
+    return location_ids
+
+
+
+def resolve_report_location_ids(db: Session, shop_id, requested: list[int] | None = None):
+    """
+    The requested locations after checking they belong to the shop, or
+    the default report locations when none are requested.
+    """
+    if not requested:
+        return get_report_location_ids(db, shop_id)
+
+    location_ids = sorted(set(requested))
+    known = {
+        row[0]
+        for row in db.query(Location.id)
+        .filter(Location.shop_id == shop_id, Location.id.in_(location_ids))
+        .all()
+    }
+
+    if len(known) != len(location_ids):
+        raise ValueError("Invalid location_ids detected")
+
+    return location_ids
@@ -1,48 +1,40 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 
+from core.prepared import execute_prepared
 
-def low_stock_items(
-    shop_id: str,
-    threshold_number: int,
-    db: Session,
-    sales_duration: int
-):
 
-    sql = text("""
+LOW_STOCK_ITEMS_SQL = """
         WITH sales2 AS (
             SELECT 
                 shop_id,
-                title,
-                size,
-                color,
-                sku,
+                variant_id,
                 SUM(quantity_sold) AS net_items_sold
-            FROM sales
+            FROM sales_daily
             WHERE shop_id = :shop_id
-            GROUP BY shop_id, title, size, color, sku
+            GROUP BY shop_id, variant_id
         ),
 
         main AS (
             SELECT
-                i.title,
-                i.size,
-                i.sku,
-                i.inventory,
+                i.variant_id,
+                MAX(i.title) AS title,
+                MAX(i.variant_title) AS variant_title,
+                MAX(i.sku) AS sku,
+                SUM(i.inventory) AS inventory,
                 i.shop_id,
-                i.price,
                 COALESCE(s.net_items_sold, 0) AS net_items_sold
             FROM inventory i
             LEFT JOIN sales2 s
-                ON i.sku = s.sku
+                ON i.variant_id = s.variant_id
             AND i.shop_id = s.shop_id
             WHERE i.shop_id = :shop_id
+            GROUP BY i.variant_id, i.shop_id, s.net_items_sold
         ),
 
         cte3 AS (
             SELECT
                 title,
-                size,
+                variant_title,
                 sku,
                 inventory,
                 shop_id,
@@ -60,21 +52,37 @@ def low_stock_items(
             WHERE sku IS NOT NULL
         )
         
-        SELECT title, size, sku, inventory, lifetime 
+        SELECT title, variant_title, sku, inventory, lifetime 
         FROM cte3 
         WHERE lifetime IS NOT NULL
         AND lifetime < :threshold_number
         ORDER BY lifetime ASC
         
-    """)
+"""
+LOW_STOCK_ITEMS_TYPES = {
+    "shop_id": "uuid",
+    "threshold_number": "integer",
+    "sales_duration": "integer",
+}
+
+
+def low_stock_items(
+    shop_id: str,
+    threshold_number: int,
+    db: Session,
+    sales_duration: int
+):
 
-    result = db.execute(
-        sql,
+    result = execute_prepared(
+        db,
+        "low_stock_items",
+        LOW_STOCK_ITEMS_SQL,
         {
             "shop_id": shop_id,
             "threshold_number": threshold_number,
             "sales_duration": sales_duration
-        }
+        },
+        LOW_STOCK_ITEMS_TYPES,
     ).fetchall()
 
     return [dict(row._mapping) for row in result]
\ No newline at end of file
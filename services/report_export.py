@@ -0,0 +1,127 @@
+import csv
+import io
+import json
+from decimal import ROUND_HALF_UP, Decimal
+
+from sqlalchemy import text
+
+from services.forecast_snapshot import has_forecast_snapshot
+from services.report_pages import LIVE_SOURCE, REPORT_COLUMNS, SNAPSHOT_FROM
+
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+# Rows fetched per round trip from the server-side cursor and sent per chunk
+EXPORT_BATCH_SIZE = 1000
+# CSV formatting of numeric columns, the same whichever source the rows come from
+CSV_TWO_PLACES = {"coverage_days", "sales_per_day"}
+CSV_INTEGERS = {"inventory", "restock_amount"}
+CSV_NUMERIC_POSITIONS = [
+    (position, column in CSV_TWO_PLACES)
+    for position, column in enumerate(REPORT_COLUMNS)
+    if column in CSV_TWO_PLACES | CSV_INTEGERS
+]
+
+
+def _json_default(value):
+    # As jsonable_encoder encodes the stored snapshot: 3 stays 3, 3.00 becomes 3.0
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _csv_row(row) -> list:
+    """Numbers as 2-place decimals or integers, from Decimals (live) or JSON text (snapshot)."""
+    row = list(row)
+
+    for position, two_places in CSV_NUMERIC_POSITIONS:
+        value = row[position]
+        if value is None:
+            continue
+        value = Decimal(value)
+        row[position] = value.quantize(Decimal("0.01"), ROUND_HALF_UP) if two_places else int(value)
+
+    return row
+
+
+def _export_query(from_snapshot: bool, export_format: str) -> str:
+    if not from_snapshot:
+        return LIVE_SOURCE + "    ORDER BY forecast.unrounded_sales_per_day DESC, forecast.variant_id"
+
+    if export_format == "ndjson":
+        # Already JSON in the database: sent as stored, never decoded here
+        columns = "forecast.row::text"
+    else:
+        columns = ", ".join(f"forecast.row->>'{column}'" for column in REPORT_COLUMNS)
+
+    return f"\n    SELECT {columns}" + SNAPSHOT_FROM + "    ORDER BY forecast.position"
+
+
+def _encode_batch(rows, export_format: str, from_snapshot: bool) -> bytes:
+    if export_format == "ndjson":
+        if from_snapshot:
+            lines = [row[0] for row in rows]
+        else:
+            lines = [
+                json.dumps(dict(zip(REPORT_COLUMNS, row)), default=_json_default)
+                for row in rows
+            ]
+        return ("\n".join(lines) + "\n").encode()
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(_csv_row(row) for row in rows)
+    return buffer.getvalue().encode()
+
+
+def iter_report_export(
+    session_factory,
+    shop_id,
+    restock_days: int,
+    minimum_value: int,
+    sales_duration: int,
+    location_ids: list[int],
+    export_format: str = "csv",
+):
+    """
+    Yield the report as CSV or NDJSON chunks in the report's order.
+
+    Opens its own session, because it runs while the response is being
+    sent, and reads through a server-side cursor, so memory stays at one
+    batch whatever the catalog size. The CSV header goes out before the
+    query runs.
+    """
+    if export_format == "csv":
+        yield (",".join(REPORT_COLUMNS) + "\r\n").encode()
+
+    db = session_factory()
+    try:
+        from_snapshot = has_forecast_snapshot(
+            db,
+            shop_id,
+            restock_days=restock_days,
+            minimum_value=minimum_value,
+            sales_duration=sales_duration,
+            location_ids=location_ids,
+        )
+        params = {"shop_id": shop_id}
+
+        if not from_snapshot:
+            params.update({
+                "restock_days": restock_days,
+                "sales_duration": sales_duration,
+                "minimum_value": minimum_value,
+                "location_ids": location_ids,
+            })
+
+        statement = text(_export_query(from_snapshot, export_format)).execution_options(
+            yield_per=EXPORT_BATCH_SIZE,
+        )
+        result = db.execute(statement, params)
+
+        for rows in result.partitions():
+            yield _encode_batch(rows, export_format, from_snapshot)
+    finally:
+        db.rollback()
+        db.close()
@@ -0,0 +1,223 @@
+import base64
+import json
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models import Shop
+from services.forecast_snapshot import get_data_version, has_forecast_snapshot, report_cache
+from services.transformation import FORECAST_ALL_ITEMS_CTE
+
+
+# Sortable report columns and how they compare
+REPORT_SORT_KEYS = {
+    "sales_per_day": "numeric",
+    "coverage_days": "numeric",
+    "restock_amount": "numeric",
+    "inventory": "numeric",
+    "title": "text",
+    "sku": "text",
+}
+REPORT_STATUSES = ("fast moving", "moderate", "slow moving", "stock out", "never sold")
+REPORT_PAGE_DEFAULT_LIMIT = 50
+REPORT_PAGE_MAX_LIMIT = 500
+
+REPORT_COLUMNS = (
+    "variant_id", "title", "variant_title", "sku", "coverage_days",
+    "sales_per_day", "inventory", "status", "restock_amount",
+)
+
+# Rows of the stored snapshot, unnested in the database; position keeps
+# the stored order
+SNAPSHOT_FROM = """
+    FROM forecast_snapshots snapshot
+    CROSS JOIN LATERAL jsonb_array_elements(snapshot.rows) WITH ORDINALITY AS forecast(row, position)
+    WHERE snapshot.shop_id = :shop_id
+"""
+SNAPSHOT_SOURCE = "\n    SELECT forecast.row" + SNAPSHOT_FROM
+LIVE_SOURCE = FORECAST_ALL_ITEMS_CTE + f"""
+    SELECT {", ".join(f"forecast.{column}" for column in REPORT_COLUMNS)}
+    FROM forecast
+    WHERE TRUE
+"""
+
+
+def _snapshot_column(name: str, kind: str) -> str:
+    if kind == "numeric":
+        return f"COALESCE((forecast.row->>'{name}')::numeric, 0)"
+    return f"COALESCE(forecast.row->>'{name}', '')"
+
+
+def _live_column(name: str, kind: str) -> str:
+    if kind == "numeric":
+        return f"COALESCE(forecast.{name}, 0)"
+    return f"COALESCE(forecast.{name}, '')"
+
+
+def _prefix_pattern(prefix: str) -> str:
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def encode_cursor(row: dict, sort: str, descending: bool) -> str:
+    value = row.get(sort)
+
+    if REPORT_SORT_KEYS[sort] == "numeric":
+        value = "0" if value is None else str(value)
+    else:
+        value = value or ""
+
+    payload = json.dumps([sort, descending, value, row["variant_id"]]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool) -> tuple[str, int]:
+    """(sort value, variant_id) of the last row of the previous page."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, cursor_descending, value, variant_id = json.loads(payload)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if cursor_sort != sort or cursor_descending != descending:
+        raise ValueError("Cursor was issued for a different sort order")
+
+    return str(value), int(variant_id)
+
+
+def _page_query(
+    source: str,
+    column,
+    sort: str,
+    descending: bool,
+    statuses: list[str],
+    sku_prefix: str | None,
+    title_prefix: str | None,
+    after: tuple[str, int] | None,
+    limit: int,
+) -> tuple[str, dict]:
+    kind = REPORT_SORT_KEYS[sort]
+    sort_expression = column(sort, kind)
+    variant_expression = column("variant_id", "numeric")
+    conditions = []
+    params = {"limit": limit + 1}
+
+    if statuses:
+        conditions.append(f"{column('status', 'text')} = ANY(:statuses)")
+        params["statuses"] = list(statuses)
+
+    if sku_prefix:
+        conditions.append(f"{column('sku', 'text')} ILIKE :sku_prefix ESCAPE '\\'")
+        params["sku_prefix"] = _prefix_pattern(sku_prefix)
+
+    if title_prefix:
+        conditions.append(f"{column('title', 'text')} ILIKE :title_prefix ESCAPE '\\'")
+        params["title_prefix"] = _prefix_pattern(title_prefix)
+
+    if after:
+        after_value = "CAST(:after_value AS numeric)" if kind == "numeric" else ":after_value"
+        conditions.append(
+            f"({sort_expression}, {variant_expression}) {'<' if descending else '>'} "
+            f"({after_value}, :after_variant_id)"
+        )
+        params["after_value"], params["after_variant_id"] = after
+
+    direction = "DESC" if descending else "ASC"
+    sql = (
+        source
+        + "".join(f"\n    AND {condition}" for condition in conditions)
+        + f"\n    ORDER BY {sort_expression} {direction}, {variant_expression} {direction}"
+        + "\n    LIMIT :limit"
+    )
+    return sql, params
+
+
+def get_report_page(
+    db: Session,
+    shop: Shop,
+    restock_days: int,
+    minimum_value: int,
+    sales_duration: int,
+    location_ids: list[int],
+    sort: str = "sales_per_day",
+    descending: bool = True,
+    statuses: list[str] | None = None,
+    sku_prefix: str | None = None,
+    title_prefix: str | None = None,
+    cursor: str | None = None,
+    limit: int = REPORT_PAGE_DEFAULT_LIMIT,
+) -> dict:
+    """
+    One keyset page of the report. Filtering, ordering and LIMIT run in
+    Postgres, over the stored snapshot when it matches these inputs and
+    over the live forecast query otherwise, so only the page comes back.
+    Statuses are still classified against the whole catalog.
+    """
+    if sort not in REPORT_SORT_KEYS:
+        raise ValueError(f"Unknown sort key: {sort}")
+
+    unknown = set(statuses or ()) - set(REPORT_STATUSES)
+    if unknown:
+        raise ValueError(f"Unknown status: {', '.join(sorted(unknown))}")
+
+    limit = max(1, min(limit, REPORT_PAGE_MAX_LIMIT))
+    after = decode_cursor(cursor, sort, descending) if cursor else None
+
+    key = (
+        "page",
+        shop.id,
+        get_data_version(db, shop.id),
+        restock_days,
+        minimum_value,
+        sales_duration,
+        tuple(sorted(location_ids)),
+        sort,
+        descending,
+        tuple(sorted(statuses or ())),
+        sku_prefix,
+        title_prefix,
+        cursor,
+        limit,
+    )
+
+    def compute() -> dict:
+        from_snapshot = has_forecast_snapshot(
+            db,
+            shop.id,
+            restock_days=restock_days,
+            minimum_value=minimum_value,
+            sales_duration=sales_duration,
+            location_ids=location_ids,
+        )
+        sql, params = _page_query(
+            SNAPSHOT_SOURCE if from_snapshot else LIVE_SOURCE,
+            _snapshot_column if from_snapshot else _live_column,
+            sort,
+            descending,
+            statuses,
+            sku_prefix,
+            title_prefix,
+            after,
+            limit,
+        )
+        params["shop_id"] = shop.id
+
+        if not from_snapshot:
+            params.update({
+                "restock_days": restock_days,
+                "sales_duration": sales_duration,
+                "minimum_value": minimum_value,
+                "location_ids": location_ids,
+            })
+
+        result = db.execute(text(sql), params)
+        rows = [row[0] for row in result] if from_snapshot else [dict(row) for row in result.mappings()]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1], sort, descending)
+
+        return {"items": rows, "next_cursor": next_cursor, "limit": limit}
+
+    return report_cache.get_or_compute(key, compute)
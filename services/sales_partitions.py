@@ -0,0 +1,198 @@
+from datetime import date
+
+from sqlalchemy import Connection, text
+from sqlalchemy.orm import Session
+
+from core.config import (
+    SALES_PARTITION_ARCHIVE,
+    SALES_PARTITION_MONTHS_AHEAD,
+    SALES_RETENTION_MONTHS,
+)
+
+
+SALES_TABLE = "sales"
+DEFAULT_PARTITION = f"{SALES_TABLE}_default"
+ARCHIVE_SUFFIX = "_archived"
+PARTITION_LOCK_TIMEOUT = "10s"
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """sales_y2026m10 for the October 2026 partition."""
+    return f"{SALES_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> date | None:
+    prefix = f"{SALES_TABLE}_y"
+
+    if not name.startswith(prefix):
+        return None
+
+    try:
+        year, month = name[len(prefix):].split("m")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+def list_sales_partitions(db: Session | Connection) -> dict[date, str]:
+    """Monthly partitions currently attached to sales, by first day of month."""
+    names = db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+    """), {"table": SALES_TABLE}).scalars()
+
+    partitions = {}
+    for name in names:
+        month = partition_month(name)
+        if month:
+            partitions[month] = name
+
+    return partitions
+
+
+def holds_sales_lock(db: Session) -> bool:
+    """Whether the session's open transaction has already touched sales."""
+    return bool(db.execute(text("""
+        SELECT EXISTS (
+            SELECT 1
+            FROM pg_locks
+            JOIN pg_class ON pg_class.oid = pg_locks.relation
+            WHERE pg_locks.pid = pg_backend_pid()
+              AND pg_class.relname = :table
+        )
+    """), {"table": SALES_TABLE}).scalar())
+
+
+def ensure_sales_partitions(db: Session, start_date: date, end_date: date) -> list[str]:
+    """
+    Create the missing monthly partitions for start_date..end_date.
+
+    Creating a partition locks the whole sales table, so the DDL runs and
+    commits on a connection of its own: the caller's transaction is left
+    untouched and never holds that lock. That DDL would wait forever on a
+    caller whose transaction has already read sales, so then nothing is
+    created and the rows land in DEFAULT_PARTITION until a later call
+    creates their month. PARTITION_LOCK_TIMEOUT makes it fail instead of
+    waiting behind other sessions.
+
+    A new month is built as a plain table, the default partition's rows
+    for it are moved in, and it is then attached; attaching checks that
+    the default no longer holds rows for the month. Concurrent calls
+    queue on the default partition's lock and skip months created
+    meanwhile.
+    """
+    existing = list_sales_partitions(db)
+    missing = []
+    month = month_start(start_date)
+
+    while month <= end_date:
+        if month not in existing:
+            missing.append(month)
+        month = add_months(month, 1)
+
+    if not missing:
+        return []
+
+    if holds_sales_lock(db):
+        print(
+            f"[PARTITIONS] Transaction already reads {SALES_TABLE}; "
+            f"{', '.join(partition_name(month) for month in missing)} left to {DEFAULT_PARTITION}"
+        )
+        return []
+
+    created = []
+    with db.get_bind().begin() as connection:
+        connection.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+        connection.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+        existing = list_sales_partitions(connection)
+
+        for month in missing:
+            if month in existing:
+                continue
+
+            name = partition_name(month)
+            start, end = month.isoformat(), add_months(month, 1).isoformat()
+            connection.execute(text(f"CREATE TABLE {name} (LIKE {SALES_TABLE} INCLUDING DEFAULTS)"))
+            connection.execute(text(f"""
+                WITH moved AS (
+                    DELETE FROM {DEFAULT_PARTITION}
+                    WHERE created_at >= '{start}' AND created_at < '{end}'
+                    RETURNING *
+                )
+                INSERT INTO {name} SELECT * FROM moved
+            """))
+            connection.execute(text(
+                f"ALTER TABLE {SALES_TABLE} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            ))
+            created.append(name)
+
+    if not created:
+        return []
+
+    print(f"[PARTITIONS] Created {', '.join(created)}")
+    return created
+
+
+def expire_sales_partitions(db: Session, before: date, archive: bool = False) -> list[str]:
+    """
+    Drop every partition that ends on or before `before`.
+
+    With archive the partition is detached and renamed instead, so its
+    rows stay queryable as a standalone table until someone drops it.
+    """
+    expired = []
+
+    for month, name in sorted(list_sales_partitions(db).items()):
+        if add_months(month, 1) > before:
+            continue
+
+        if archive:
+            db.execute(text(f"ALTER TABLE {SALES_TABLE} DETACH PARTITION {name}"))
+            db.execute(text(f"ALTER TABLE {name} RENAME TO {name}{ARCHIVE_SUFFIX}"))
+        else:
+            db.execute(text(f"DROP TABLE {name}"))
+        expired.append(name)
+
+    return expired
+
+
+def maintain_sales_partitions(
+    db: Session,
+    today: date | None = None,
+    retention_months: int = SALES_RETENTION_MONTHS,
+    months_ahead: int = SALES_PARTITION_MONTHS_AHEAD,
+    archive: bool = SALES_PARTITION_ARCHIVE,
+) -> dict:
+    """
+    Keep partitions from retention_months back through months_ahead
+    forward, so syncs inside that window never have to create one.
+    Retention is a metadata change: whole months are dropped (or
+    detached) instead of deleting rows.
+    """
+    current = month_start(today or date.today())
+
+    created = ensure_sales_partitions(
+        db,
+        add_months(current, -retention_months),
+        add_months(current, months_ahead),
+    )
+    expired = expire_sales_partitions(db, add_months(current, -retention_months), archive)
+    db.commit()
+
+    if expired:
+        print(f"[PARTITIONS] {'Archived' if archive else 'Dropped'} {', '.join(expired)}")
+
+    return {"created": created, "archived" if archive else "dropped": expired}
@@ -1,9 +1,146 @@
-import requests
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import httpx
 from sqlalchemy.orm import Session
+from core import shopify_client
 from core.auth import get_valid_shopify_access_token
-from models import Inventory, Sales, Shop
-from dateutil.parser import isoparse
- 
+from core.config import (
+    SHOPIFY_ADMIN_BASE_URL,
+    SHOPIFY_API_VERSION,
+    SHOPIFY_BULK_ORDER_THRESHOLD,
+    SHOPIFY_BULK_POLL_SECONDS,
+    SHOPIFY_BULK_TIMEOUT_SECONDS,
+    SHOPIFY_BULK_VARIANT_THRESHOLD,
+    SHOPIFY_RETRY_MAX_ATTEMPTS,
+    SHOPIFY_SALES_SHARD_DAYS,
+    SHOPIFY_SALES_SHARD_ORDER_THRESHOLD,
+    SHOPIFY_SALES_SHARD_WORKERS,
+    SHOPIFY_THROTTLE_MAX_RETRIES,
+)
+from core.shopify_resilience import (
+    RETRYABLE_STATUS_CODES,
+    ShopifyUnavailableError,
+    backoff_delay,
+    get_breaker,
+    is_retryable_graphql_error,
+)
+from core.shopify_throttle import ShopifyThrottledError, get_bucket, is_throttled
+from models import Shop
+from services.shopify_parsing import gid_to_int, loads, parse_date, parse_datetime
+
+
+BULK_INVENTORY_QUERY = """
+{
+  products {
+    edges {
+      node {
+        id
+        title
+        variants {
+          edges {
+            node {
+              id
+              sku
+              title
+              price
+              inventoryItem {
+                id
+                inventoryLevels {
+                  edges {
+                    node {
+                      id
+                      quantities(names: ["available"]) {
+                        name
+                        quantity
+                      }
+                      location {
+                        id
+                        name
+                      }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+LEVEL_FIELDS = """
+quantities(names: ["available"]) {
+  name
+  quantity
+}
+location {
+  id
+  name
+}
+"""
+
+VARIANT_FIELDS = """
+id
+sku
+title
+price
+inventoryItem {
+  id
+  inventoryLevels(first: 10) {
+    edges {
+      node {
+        %s
+      }
+    }
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+  }
+}
+""" % LEVEL_FIELDS
+
+LINE_ITEM_FIELDS = """
+id
+title
+quantity
+variant {
+  id
+  sku
+  title
+  product {
+    title
+  }
+}
+"""
+
+PAGE_INFO_FIELDS = "pageInfo { hasNextPage endCursor }"
+
+# Follow-up fragments resume a truncated connection from $after
+VARIANTS_FRAGMENT = (
+    "... on Product { variants(first: 50, after: $after) { edges { node { %s } } %s } }"
+    % (VARIANT_FIELDS, PAGE_INFO_FIELDS)
+)
+LEVELS_FRAGMENT = (
+    "... on InventoryItem { inventoryLevels(first: 50, after: $after) { edges { node { %s } } %s } }"
+    % (LEVEL_FIELDS, PAGE_INFO_FIELDS)
+)
+LINE_ITEMS_FRAGMENT = (
+    "... on Order { lineItems(first: 50, after: $after) { edges { node { %s } } %s } }"
+    % (LINE_ITEM_FIELDS, PAGE_INFO_FIELDS)
+)
+
+BULK_FINISHED_STATUSES = {"COMPLETED", "FAILED", "CANCELED", "EXPIRED"}
+PAGE_SIZE = 50
+BULK_BATCH_SIZE = 1000
+NESTED_BATCH_SIZE = 10
 
 
 class Operations:
@@ -11,13 +148,22 @@ class Operations:
         self.domain = domain
         self.token = token
         self.shop_id = shop_id
-        self.endpoint = f"https://{self.domain}/admin/api/2024-01/graphql.json"
+        base_url = SHOPIFY_ADMIN_BASE_URL or f"https://{self.domain}"
+        self.endpoint = f"{base_url}/admin/api/{SHOPIFY_API_VERSION}/graphql.json"
 
         self.headers = {
             "X-Shopify-Access-Token": self.token,
             "Content-Type": "application/json"
         }
 
+        self.max_order_updated_at = None
+        self._watermark_lock = threading.Lock()
+
+        self.bucket = get_bucket(self.domain)
+        self.breaker = get_breaker(self.domain)
+        self._query_costs = {}
+        self._cost_per_item = {}
+
     @classmethod
     def from_shop(
         cls,
@@ -36,61 +182,515 @@ class Operations:
         return cls(shop_domain, access_token, shop.id if shop else None)
 
     # ---------- Internal helper ----------
+    def _expected_cost(self, query: str, variables: dict) -> float:
+        cost_per_item = self._cost_per_item.get(query)
+        if cost_per_item and "first" in variables:
+            return cost_per_item * variables["first"]
+        return self._query_costs.get(query, 0)
+
+    def _record_cost(self, query: str, variables: dict, cost: dict | None) -> None:
+        if not cost:
+            return
+
+        self.bucket.update(cost.get("throttleStatus"))
+
+        requested = cost.get("requestedQueryCost")
+        if requested is None:
+            return
+
+        self._query_costs[query] = requested
+        if variables.get("first"):
+            self._cost_per_item[query] = requested / variables["first"]
+
+    def _page_size(self, query: str, max_first: int = PAGE_SIZE) -> int:
+        return self.bucket.page_size(max_first, self._cost_per_item.get(query))
+
+    def _transient_failure(self, attempt: int, reason: str, error: Exception | None = None) -> int:
+        """Count a transient failure, then back off or give up; returns the next attempt."""
+        self.breaker.record_failure()
+
+        if attempt >= SHOPIFY_RETRY_MAX_ATTEMPTS:
+            raise ShopifyUnavailableError(
+                f"Shopify unavailable for {self.domain} after {attempt} attempts: {reason}"
+            ) from error
+
+        time.sleep(backoff_delay(attempt))
+        return attempt + 1
+
     def _graphql(self, query: str, variables: dict | None = None):
-        response = requests.post(
-            self.endpoint,
-            headers=self.headers,
-            json={"query": query, "variables": variables or {}},
-            timeout=30
-        )
+        variables = variables or {}
+        attempt = 1
+        throttled = 0
+
+        # Retrying the same variables resumes a paged walk from its last cursor
+        while True:
+            self.breaker.before_request(self.domain)
+
+            try:
+                self.bucket.acquire(self._expected_cost(query, variables))
+
+                try:
+                    response = shopify_client.post(
+                        self.endpoint,
+                        headers=self.headers,
+                        json={"query": query, "variables": variables},
+                    )
+                except httpx.TransportError as exc:
+                    attempt = self._transient_failure(attempt, f"transport error {exc!r}", exc)
+                    continue
 
-        if response.status_code != 200:
-            raise Exception(f"Shopify HTTP error: {response.text}")
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    attempt = self._transient_failure(
+                        attempt,
+                        f"HTTP {response.status_code}",
+                        httpx.HTTPStatusError(
+                            f"HTTP {response.status_code}: {response.text}",
+                            request=response.request,
+                            response=response,
+                        ),
+                    )
+                    continue
 
-        data = response.json()
+                if response.status_code == 429:
+                    self.breaker.release_trial()
+                    throttled += 1
+                    if throttled > SHOPIFY_THROTTLE_MAX_RETRIES:
+                        break
+                    time.sleep(float(response.headers.get("Retry-After") or 1))
+                    continue
 
-        if "errors" in data:
-            raise Exception(f"Shopify GraphQL error: {data['errors']}")
+                if response.status_code != 200:
+                    raise Exception(f"Shopify HTTP error: {response.text}")
 
-        return data["data"]
+                data = loads(response.content)
+                self._record_cost(query, variables, (data.get("extensions") or {}).get("cost"))
+
+                # The bucket now holds Shopify's own figures, so the next
+                # acquire() waits exactly as long as the restore rate needs.
+                if is_throttled(data.get("errors")):
+                    self.breaker.release_trial()
+                    throttled += 1
+                    if throttled > SHOPIFY_THROTTLE_MAX_RETRIES:
+                        break
+                    continue
+
+                if is_retryable_graphql_error(data.get("errors")):
+                    attempt = self._transient_failure(attempt, f"GraphQL errors {data['errors']}")
+                    continue
+
+                if "errors" in data:
+                    raise Exception(f"Shopify GraphQL error: {data['errors']}")
+
+            except ShopifyUnavailableError:
+                # Already counted by _transient_failure
+                raise
+            except BaseException:
+                # Any other error still ends a trial call, so the circuit
+                # cannot stay stuck waiting for it
+                self.breaker.record_failure()
+                raise
+
+            self.breaker.record_success()
+            return data["data"]
+
+        raise ShopifyThrottledError(f"Shopify throttled {self.domain} after {SHOPIFY_THROTTLE_MAX_RETRIES} retries")
+
+    # ---------- Bulk operations ----------
+    def _run_bulk_query(self, bulk_query: str):
+        """
+        Submit a bulkOperationRunQuery, wait for it to finish and yield
+        every JSONL record of the export one at a time.
+        """
+        mutation = """
+        mutation ($query: String!) {
+          bulkOperationRunQuery(query: $query) {
+            bulkOperation {
+              id
+              status
+            }
+            userErrors {
+              field
+              message
+            }
+          }
+        }
+        """
+
+        data = self._graphql(mutation, {"query": bulk_query})
+        result = data["bulkOperationRunQuery"]
+
+        if result.get("userErrors"):
+            raise Exception(f"Shopify bulk operation error: {result['userErrors']}")
+
+        url = self._wait_for_bulk_operation(result["bulkOperation"]["id"])
+
+        # A bulk operation that matched nothing finishes without a file
+        if not url:
+            return
+
+        with shopify_client.stream("GET", url) as response:
+            if response.status_code != 200:
+                raise Exception(f"Shopify bulk download error: {response.status_code}")
+
+            for line in response.iter_lines():
+                if line:
+                    yield loads(line)
+
+    def _wait_for_bulk_operation(self, operation_id: str) -> str | None:
+        query = """
+        query ($id: ID!) {
+          node(id: $id) {
+            ... on BulkOperation {
+              id
+              status
+              errorCode
+              objectCount
+              url
+            }
+          }
+        }
+        """
+
+        deadline = time.monotonic() + SHOPIFY_BULK_TIMEOUT_SECONDS
+
+        while True:
+            operation = self._graphql(query, {"id": operation_id}).get("node") or {}
+            status = operation.get("status")
+
+            if status in BULK_FINISHED_STATUSES:
+                break
+
+            if time.monotonic() >= deadline:
+                raise Exception(f"Shopify bulk operation timed out: {operation_id}")
+
+            time.sleep(SHOPIFY_BULK_POLL_SECONDS)
+
+        if status != "COMPLETED":
+            raise Exception(
+                f"Shopify bulk operation {status}: {operation.get('errorCode')}"
+            )
+
+        print(f"[BULK] {operation_id} completed with {operation.get('objectCount')} objects")
+        return operation.get("url")
+
+    def count_variants(self) -> int:
+        data = self._graphql("""
+        {
+          productVariantsCount {
+            count
+          }
+        }
+        """)
+        return int((data.get("productVariantsCount") or {}).get("count") or 0)
+
+    def _inventory_mode(self) -> str:
+        try:
+            variant_count = self.count_variants()
+        except Exception as exc:
+            print(f"[SYNC] Variant count failed, using paged inventory: {exc}")
+            return "paged"
+
+        return "bulk" if variant_count >= SHOPIFY_BULK_VARIANT_THRESHOLD else "paged"
+
+    def _inventory_row(self, product_title: str, variant: dict, variant_id: int, level: dict) -> dict | None:
+        location = level.get("location")
+        if not location:
+            return None
+
+        try:
+            location_id = gid_to_int(location["id"])
+        except Exception:
+            return None
+
+        available_quantity = 0
+        for quantity_info in level.get("quantities", ()):
+            if quantity_info.get("name") == "available":
+                available_quantity = quantity_info.get("quantity")
+                break
+
+        try:
+            available = int(available_quantity or 0)
+        except (TypeError, ValueError):
+            available = 0
+
+        return {
+            "shop_id": self.shop_id,
+            "variant_id": variant_id,
+            "location_id": location_id,
+            "title": product_title,
+            "variant_title": variant.get("title"),
+            "sku": variant.get("sku"),
+            "inventory": available,
+            "price": variant.get("price"),
+        }
 
 # ---------- Public method ----------
-    def get_inventory(self):
+    def iter_inventory(self, mode: str = "auto", updated_since=None):
+        """
+        Yield inventory rows (one per variant and location) in per-page batches.
+
+        With updated_since only the rows of products updated since then and
+        of inventory levels whose quantities changed since then are returned.
+        Otherwise mode="auto" runs a bulk operation for catalogs at or above
+        SHOPIFY_BULK_VARIANT_THRESHOLD variants and pages otherwise.
+        """
+        if updated_since is not None:
+            search = f"updated_at:>='{updated_since.isoformat()}'"
+            yield from self._iter_inventory_paged(product_query=search)
+            yield from self._iter_changed_inventory_levels(search)
+            return
+
+        if mode == "auto":
+            mode = self._inventory_mode()
+
+        if mode == "bulk":
+            yield from self._iter_inventory_bulk()
+        else:
+            yield from self._iter_inventory_paged()
+
+    def _iter_inventory_bulk(self):
+        # Shopify writes each product before its variants and each variant
+        # before its inventory levels, so only the current product and
+        # variant are kept: memory stays at one batch of rows.
+        product_title = ""
+        variant = None  # (variant gid, inventory item gid, variant_id, fields)
+        orphaned = 0
+        rows = []
+
+        for record in self._run_bulk_query(BULK_INVENTORY_QUERY):
+            gid = record.get("id", "")
+
+            if gid.startswith("gid://shopify/Product/"):
+                product_title = record.get("title", "")
+                variant = None
+                continue
+
+            if gid.startswith("gid://shopify/ProductVariant/"):
+                try:
+                    variant_id = gid_to_int(gid)
+                except Exception:
+                    variant = None
+                    continue
+
+                inventory_item = record.get("inventoryItem") or {}
+                fields = {key: record.get(key) for key in ("title", "sku", "price")}
+                variant = (gid, inventory_item.get("id"), variant_id, fields)
+                continue
+
+            # Inventory levels point at their variant (or inventory item)
+            parent_id = record.get("__parentId")
+            if variant is None or parent_id not in variant[:2]:
+                orphaned += 1
+                continue
+
+            row = self._inventory_row(product_title, variant[3], variant[2], record)
+            if row:
+                rows.append(row)
+
+            if len(rows) >= BULK_BATCH_SIZE:
+                yield rows
+                rows = []
+
+        if rows:
+            yield rows
+
+        if orphaned:
+            print(f"[BULK] Dropped {orphaned} inventory levels that did not follow their variant for {self.domain}")
+
+    def _get_location_ids(self) -> list[str]:
         query = """
         query ($cursor: String) {
-          products(first: 50, after: $cursor) {
+          locations(first: 250, after: $cursor) {
             edges {
               node {
                 id
-                title
-                variants(first: 50) {
-                  edges {
-                    node {
+              }
+            }
+            pageInfo {
+              hasNextPage
+              endCursor
+            }
+          }
+        }
+        """
+
+        cursor = None
+        has_next_page = True
+        location_ids = []
+
+        while has_next_page:
+            locations = self._graphql(query, {"cursor": cursor}).get("locations", {})
+            location_ids.extend(edge["node"]["id"] for edge in locations.get("edges", []))
+            cursor = locations.get("pageInfo", {}).get("endCursor")
+            has_next_page = locations.get("pageInfo", {}).get("hasNextPage")
+
+        return location_ids
+
+    def _iter_changed_inventory_levels(self, search: str):
+        # Quantity changes do not touch the product's updated_at, so levels
+        # are filtered on their own updated_at, one location at a time.
+        query = """
+        query ($id: ID!, $cursor: String, $first: Int!, $query: String) {
+          location(id: $id) {
+            inventoryLevels(first: $first, after: $cursor, query: $query) {
+              edges {
+                node {
+                  quantities(names: ["available"]) {
+                    name
+                    quantity
+                  }
+                  location {
+                    id
+                    name
+                  }
+                  item {
+                    variant {
                       id
                       sku
                       title
                       price
-                      inventoryItem {
-                        id
-                        inventoryLevels(first: 10) {
-                          edges {
-                            node {
-                              quantities(names: ["available"]) {
-                                name
-                                quantity
-                              }
-                              location {
-                                id
-                                name
-                              }
-                            }
-                          }
-                        }
+                      product {
+                        title
                       }
                     }
                   }
                 }
               }
+              pageInfo {
+                hasNextPage
+                endCursor
+              }
+            }
+          }
+        }
+        """
+
+        for location_id in self._get_location_ids():
+            cursor = None
+            has_next_page = True
+
+            while has_next_page:
+                rows = []
+                data = self._graphql(query, {
+                    "id": location_id,
+                    "cursor": cursor,
+                    "first": self._page_size(query),
+                    "query": search,
+                })
+                levels = (data.get("location") or {}).get("inventoryLevels", {})
+
+                for level_edge in levels.get("edges", []):
+                    level = level_edge.get("node", {})
+                    variant = (level.get("item") or {}).get("variant")
+                    if not variant:
+                        continue
+
+                    try:
+                        variant_id = gid_to_int(variant["id"])
+                    except Exception:
+                        continue
+
+                    product_title = (variant.get("product") or {}).get("title", "")
+                    row = self._inventory_row(product_title, variant, variant_id, level)
+                    if row:
+                        rows.append(row)
+
+                yield rows
+
+                cursor = levels.get("pageInfo", {}).get("endCursor")
+                has_next_page = levels.get("pageInfo", {}).get("hasNextPage")
+
+    def _follow_up(self, fragment: str, connection: str, parents: list[tuple[str, str]]):
+        """
+        Page the remaining children of truncated nested connections.
+
+        parents holds (parent gid, endCursor) pairs; up to NESTED_BATCH_SIZE
+        of them are fetched per request as aliased node() lookups, each
+        resuming from its own cursor. Yields (parent gid, child node).
+        """
+        pending = list(parents)
+
+        while pending:
+            batch, pending = pending[:NESTED_BATCH_SIZE], pending[NESTED_BATCH_SIZE:]
+
+            declarations = []
+            selections = []
+            variables = {}
+            for index, (parent_id, cursor) in enumerate(batch):
+                declarations.append(f"$id{index}: ID!, $after{index}: String")
+                selections.append(
+                    f"n{index}: node(id: $id{index}) {{ "
+                    + fragment.replace("$after", f"$after{index}")
+                    + " }"
+                )
+                variables[f"id{index}"] = parent_id
+                variables[f"after{index}"] = cursor
+
+            query = f"query ({', '.join(declarations)}) {{ {' '.join(selections)} }}"
+            data = self._graphql(query, variables)
+
+            for index, (parent_id, _) in enumerate(batch):
+                children = (data.get(f"n{index}") or {}).get(connection) or {}
+
+                for edge in children.get("edges", []):
+                    yield parent_id, edge.get("node", {})
+
+                page_info = children.get("pageInfo", {})
+                if page_info.get("hasNextPage"):
+                    pending.append((parent_id, page_info.get("endCursor")))
+
+    def _add_variant_rows(self, product_title: str, variant: dict, rows: list, truncated_levels: list, items: dict) -> None:
+        if not variant:
+            return
+
+        # 🔥 Extract variant_id safely
+        try:
+            variant_id = gid_to_int(variant["id"])
+        except Exception:
+            return
+
+        inventory_item = variant.get("inventoryItem")
+        if not inventory_item:
+            return
+
+        inventory_levels = inventory_item.get("inventoryLevels", {})
+
+        # 🔥 Loop per location (CRITICAL CHANGE)
+        for level_edge in inventory_levels.get("edges", []):
+            row = self._inventory_row(
+                product_title,
+                variant,
+                variant_id,
+                level_edge.get("node", {}),
+            )
+            if row:
+                rows.append(row)
+
+        page_info = inventory_levels.get("pageInfo", {})
+        if page_info.get("hasNextPage"):
+            items[inventory_item["id"]] = (product_title, variant, variant_id)
+            truncated_levels.append((inventory_item["id"], page_info.get("endCursor")))
+
+    def _iter_inventory_paged(self, product_query: str | None = None):
+        query = """
+        query ($cursor: String, $first: Int!, $query: String) {
+          products(first: $first, after: $cursor, query: $query) {
+            edges {
+              node {
+                id
+                title
+                variants(first: 50) {
+                  edges {
+                    node {
+                      %s
+                    }
+                  }
+                  pageInfo {
+                    hasNextPage
+                    endCursor
+                  }
+                }
+              }
             }
             pageInfo {
               hasNextPage
@@ -98,111 +698,304 @@ class Operations:
             }
           }
         }
-        """
+        """ % VARIANT_FIELDS
 
         cursor = None
         has_next_page = True
-        rows = []
 
         while has_next_page:
-            data = self._graphql(query, {"cursor": cursor})
+            rows = []
+            data = self._graphql(query, {
+                "cursor": cursor,
+                "first": self._page_size(query),
+                "query": product_query,
+            })
             products = data.get("products", {})
 
+            product_titles = {}
+            truncated_variants = []
+            truncated_levels = []
+            items = {}
+
             for product_edge in products.get("edges", []):
                 product_node = product_edge.get("node", {})
                 product_title = product_node.get("title", "")
+                variants = product_node.get("variants", {})
 
-                for variant_edge in product_node.get("variants", {}).get("edges", []):
-                    variant = variant_edge.get("node", {})
+                for variant_edge in variants.get("edges", []):
+                    self._add_variant_rows(
+                        product_title,
+                        variant_edge.get("node", {}),
+                        rows,
+                        truncated_levels,
+                        items,
+                    )
 
-                    if not variant:
-                        continue
+                page_info = variants.get("pageInfo", {})
+                if page_info.get("hasNextPage"):
+                    product_titles[product_node["id"]] = product_title
+                    truncated_variants.append((product_node["id"], page_info.get("endCursor")))
 
-                    # 🔥 Extract variant_id safely
-                    try:
-                        variant_id = int(variant["id"].split("/")[-1])
-                    except Exception:
-                        continue
+            # Finish the page before yielding it: variants past the first 50,
+            # then levels past the first 10 (including those of new variants).
+            for product_id, variant in self._follow_up(VARIANTS_FRAGMENT, "variants", truncated_variants):
+                self._add_variant_rows(product_titles[product_id], variant, rows, truncated_levels, items)
 
-                    inventory_item = variant.get("inventoryItem")
-                    if not inventory_item:
-                        continue
+            for item_id, level in self._follow_up(LEVELS_FRAGMENT, "inventoryLevels", truncated_levels):
+                row = self._inventory_row(*items[item_id], level)
+                if row:
+                    rows.append(row)
 
-                    inventory_levels = inventory_item.get("inventoryLevels", {}).get("edges", [])
-
-                    # 🔥 Loop per location (CRITICAL CHANGE)
-                    for level_edge in inventory_levels:
-                        node = level_edge.get("node", {})
-
-                        location = node.get("location")
-                        if not location:
-                            continue
-
-                        try:
-                            location_id = int(location["id"].split("/")[-1])
-                        except Exception:
-                            continue
-
-                        available_quantity = next(
-                            (
-                                quantity_info.get("quantity")
-                                for quantity_info in node.get("quantities", [])
-                                if quantity_info.get("name") == "available"
-                            ),
-                            0
-                        )
-
-                        try:
-                            available = int(available_quantity or 0)
-                        except (TypeError, ValueError):
-                            available = 0
-
-                        rows.append({
-                            "shop_id": self.shop_id,
-                            "variant_id": variant_id,
-                            "location_id": location_id,
-                            "title": product_title,
-                            "variant_title": variant.get("title"),
-                            "sku": variant.get("sku"),
-                            "inventory": available,
-                            "price": variant.get("price"),
-                        })
+            yield rows
 
             cursor = products.get("pageInfo", {}).get("endCursor")
             has_next_page = products.get("pageInfo", {}).get("hasNextPage")
 
-        return rows
-      
-      
-    def delete_inventory(self,shop_id : str ,database: Session):
-        database.query(Inventory).filter(Inventory.shop_id == shop_id).delete()
-        database.commit()
-        
-    def get_sales(self, start_date, end_date) -> list:
-      start_date = start_date.isoformat()
-      end_date = end_date.isoformat()
+    def count_orders(self, date_query: str) -> int:
+        data = self._graphql("""
+        query ($query: String!) {
+          ordersCount(query: $query) {
+            count
+          }
+        }
+        """, {"query": date_query})
+        return int((data.get("ordersCount") or {}).get("count") or 0)
+
+    def _sales_mode(self, date_query: str) -> str:
+        try:
+            order_count = self.count_orders(date_query)
+        except Exception as exc:
+            print(f"[SYNC] Order count failed, using paged sales: {exc}")
+            return "paged"
+
+        if order_count >= SHOPIFY_BULK_ORDER_THRESHOLD:
+            return "bulk"
+        if order_count >= SHOPIFY_SALES_SHARD_ORDER_THRESHOLD:
+            return "sharded"
+        return "paged"
+
+    def _read_order(self, order: dict) -> tuple:
+        """Return (created_at date, order_id) and advance the updated_at watermark."""
+        updated_at = order.get("updatedAt")
+        if updated_at:
+            updated_at = parse_datetime(updated_at)
+            with self._watermark_lock:
+                if self.max_order_updated_at is None or updated_at > self.max_order_updated_at:
+                    self.max_order_updated_at = updated_at
+
+        try:
+            order_id = gid_to_int(order["id"])
+        except Exception:
+            order_id = None
+
+        return parse_date(order["createdAt"]), order_id
+
+    def _sales_row(self, created_at, order_id: int | None, item: dict) -> dict | None:
+        variant = item.get("variant")
+
+        if not variant:
+            return None
 
+        try:
+            variant_id = gid_to_int(variant["id"])
+        except Exception:
+            return None
+
+        return {
+            "shop_id": self.shop_id,
+            "variant_id": variant_id,
+            "order_id": order_id,
+            "line_item_id": gid_to_int(item["id"]) if item.get("id") else None,
+            "title": variant["product"]["title"] if variant.get("product") else item.get("title", ""),
+            "variant_title": variant["title"],
+            "sku": variant["sku"],
+            "quantity_sold": int(item.get("quantity") or 0),
+            "created_at": created_at
+        }
+
+    def iter_sales(self, start_date, end_date, mode: str = "auto", updated_since=None):
+        """
+        Yield one row per order line item created inside the date window,
+        in batches that never split an order.
+
+        When updated_since is given only orders updated at or after it are
+        returned. mode="auto" runs a bulk operation once the window holds at
+        least SHOPIFY_BULK_ORDER_THRESHOLD orders, fetches date shards
+        concurrently above SHOPIFY_SALES_SHARD_ORDER_THRESHOLD and pages
+        otherwise. The largest order updatedAt seen is left in
+        max_order_updated_at.
+        """
+        date_query = self._orders_search(start_date, end_date, updated_since)
+
+        self.max_order_updated_at = None
+
+        if mode == "auto":
+            mode = self._sales_mode(date_query)
+
+        if mode == "bulk":
+            yield from self._iter_sales_bulk(date_query)
+        elif mode == "sharded":
+            yield from self._iter_sales_sharded(start_date, end_date, updated_since)
+        else:
+            yield from self._iter_sales_paged(date_query)
+
+    @staticmethod
+    def _orders_search(start_date, end_date, updated_since=None) -> str:
+        search = f"created_at:>={start_date.isoformat()} created_at:<={end_date.isoformat()}"
+        if updated_since is not None:
+            search += f" updated_at:>='{updated_since.isoformat()}'"
+        return search
+
+    def _iter_sales_sharded(
+        self,
+        start_date,
+        end_date,
+        updated_since=None,
+        shard_days: int = SHOPIFY_SALES_SHARD_DAYS,
+        max_workers: int = SHOPIFY_SALES_SHARD_WORKERS,
+    ):
+        """
+        Walk one cursor per shard_days slice of the window on up to
+        max_workers threads and merge their pages into a single stream.
+
+        Every request still goes through the shop's cost bucket, so the
+        shards share the API budget instead of multiplying it.
+        """
+        shards = []
+        shard_start = start_date
+        while shard_start <= end_date:
+            shard_end = min(shard_start + timedelta(days=shard_days - 1), end_date)
+            shards.append(self._orders_search(shard_start, shard_end, updated_since))
+            shard_start = shard_end + timedelta(days=1)
+
+        # Bounded so fast shards cannot run ahead of the writer
+        pages = queue.Queue(maxsize=max_workers * 2)
+        stop = threading.Event()
+        done = object()
+
+        def fetch_shard(search: str) -> None:
+            try:
+                if stop.is_set():
+                    return
+                for batch in self._iter_sales_paged(search):
+                    pages.put(batch)
+                    if stop.is_set():
+                        return
+            except Exception as exc:
+                pages.put(exc)
+            finally:
+                pages.put(done)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(fetch_shard, search) for search in shards]
+
+            try:
+                remaining = len(shards)
+                while remaining:
+                    item = pages.get()
+                    if item is done:
+                        remaining -= 1
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        yield item
+            finally:
+                # On error or early close, stop the shards and keep draining
+                # so no worker stays blocked on a full queue.
+                stop.set()
+                for future in futures:
+                    future.cancel()
+                while not all(future.done() for future in futures):
+                    try:
+                        pages.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+
+    def _iter_sales_bulk(self, date_query: str):
+        bulk_query = """
+        {
+          orders(query: %s) {
+            edges {
+              node {
+                id
+                createdAt
+                updatedAt
+                lineItems {
+                  edges {
+                    node {
+                      id
+                      title
+                      quantity
+                      variant {
+                        id
+                        sku
+                        title
+                        product {
+                          title
+                        }
+                      }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+        """ % json.dumps(date_query)
+
+        # Shopify writes each order before its line items, so only the
+        # current order is needed to resolve __parentId.
+        order_gid = None
+        order = None
+        orphaned = 0
+        rows = []
+
+        for record in self._run_bulk_query(bulk_query):
+            parent_id = record.get("__parentId")
+
+            if parent_id is None:
+                # Only cut a batch on an order boundary
+                if len(rows) >= BULK_BATCH_SIZE:
+                    yield rows
+                    rows = []
+
+                order_gid = record["id"]
+                order = self._read_order(record)
+                continue
+
+            if parent_id != order_gid:
+                orphaned += 1
+                continue
+
+            row = self._sales_row(*order, record)
+            if row:
+                rows.append(row)
+
+        if rows:
+            yield rows
+
+        if orphaned:
+            print(f"[BULK] Dropped {orphaned} line items that did not follow their order for {self.domain}")
+
+    def _iter_sales_paged(self, date_query: str):
       query = """
-      query ($cursor: String, $query: String!) {
-        orders(first: 50, after: $cursor, query: $query) {
+      query ($cursor: String, $query: String!, $first: Int!) {
+        orders(first: $first, after: $cursor, query: $query) {
           edges {
             node {
+              id
               createdAt
+              updatedAt
               lineItems(first: 50) {
                 edges {
                   node {
-                    title
-                    quantity
-                    variant {
-                      id
-                      sku
-                      title
-                      product {
-                        title
-                      }
-                    }
+                    %s
                   }
                 }
+                pageInfo {
+                  hasNextPage
+                  endCursor
+                }
               }
             }
           }
@@ -212,58 +1005,46 @@ class Operations:
           }
         }
       }
-      """
-
-      date_query = f"created_at:>={start_date} created_at:<={end_date}"
+      """ % LINE_ITEM_FIELDS
 
       cursor = None
       has_next_page = True
-      sales_rows = []
 
       while has_next_page:
-        
-          data = self._graphql(query, {"cursor": cursor, "query": date_query})
+          sales_rows = []
+          data = self._graphql(query, {
+              "cursor": cursor,
+              "query": date_query,
+              "first": self._page_size(query),
+          })
 
           orders = data["orders"]
+          truncated_orders = []
+          order_keys = {}
 
           for order_edge in orders["edges"]:
               order_node = order_edge["node"]
 
-              created_at = isoparse(order_node["createdAt"]).date()
+              created_at, order_id = self._read_order(order_node)
 
               for item_edge in order_node["lineItems"]["edges"]:
-                  item = item_edge["node"]
-                  variant = item.get("variant")
-
-                  if not variant:
-                      continue
-
-                  try:
-                      variant_id = int(variant["id"].split("/")[-1])
-                  except Exception:
-                      continue
-
-                  sales_rows.append({
-                      "shop_id": self.shop_id,
-                      "variant_id": variant_id,
-                      "title": variant["product"]["title"] if variant.get("product") else item.get("title", ""),
-                      "variant_title": variant["title"],
-                      "sku": variant["sku"],
-                      "quantity_sold": int(item.get("quantity") or 0),
-                      "created_at": created_at
-                  })
-
-          cursor = orders["pageInfo"]["endCursor"]
-          has_next_page = orders["pageInfo"]["hasNextPage"]
+                  row = self._sales_row(created_at, order_id, item_edge["node"])
+                  if row:
+                      sales_rows.append(row)
 
-      return sales_rows
-      
-    def delete_sales(self,shop_id : str ,database: Session):
-        database.query(Sales).filter(Sales.shop_id == shop_id).delete()
-        database.commit()
+              page_info = order_node["lineItems"].get("pageInfo", {})
+              if page_info.get("hasNextPage"):
+                  order_keys[order_node["id"]] = (created_at, order_id)
+                  truncated_orders.append((order_node["id"], page_info.get("endCursor")))
 
+          # Orders with more than 50 line items are completed before the
+          # page is yielded, so a batch still never splits an order.
+          for order_gid, item in self._follow_up(LINE_ITEMS_FRAGMENT, "lineItems", truncated_orders):
+              row = self._sales_row(*order_keys[order_gid], item)
+              if row:
+                  sales_rows.append(row)
 
-      
+          yield sales_rows
 
-        
-        
+          cursor = orders["pageInfo"]["endCursor"]
+          has_next_page = orders["pageInfo"]["hasNextPage"]
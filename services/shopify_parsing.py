@@ -0,0 +1,42 @@
+import json
+from datetime import date, datetime
+
+from dateutil.parser import isoparse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(payload: bytes | str):
+    """Decode a GraphQL response body or JSONL line, using orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def gid_to_int(gid: str) -> int:
+    """gid://shopify/ProductVariant/123 -> 123 (raises ValueError on malformed IDs)."""
+    return int(gid[gid.rindex("/") + 1:])
+
+
+def parse_date(value: str) -> date:
+    """
+    Calendar date of a Shopify ISO-8601 timestamp.
+
+    Equivalent to isoparse(value).date(): the date of an aware timestamp
+    is the date in its own offset, which is always the leading YYYY-MM-DD.
+    """
+    try:
+        return date.fromisoformat(value[:10])
+    except (TypeError, ValueError):
+        return isoparse(value).date()
+
+
+def parse_datetime(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return isoparse(value)
+
@@ -0,0 +1,493 @@
+import io
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import chain
+
+from sqlalchemy import func, or_, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from models import INVENTORY_RESOURCE, SALES_RESOURCE, Inventory, Sales, SalesDaily, Shop, SyncState
+from services.sales_partitions import ensure_sales_partitions
+from services.shopify import Operations
+
+
+INVENTORY_FULL_SYNC_DAYS = 7
+UPSERT_BATCH_SIZE = 1000
+SYNC_CHUNK_SIZE = 5000
+# Overlap between inventory syncs so clock skew never loses an update
+INVENTORY_WATERMARK_OVERLAP = timedelta(minutes=5)
+
+SALES_COPY_COLUMNS = (
+    "id", "shop_id", "variant_id", "order_id", "line_item_id", "title",
+    "variant_title", "sku", "quantity_sold", "created_at",
+)
+INVENTORY_COPY_COLUMNS = (
+    "id", "shop_id", "variant_id", "location_id", "title",
+    "variant_title", "sku", "inventory", "price",
+)
+INVENTORY_STAGING_TABLE = "inventory_staging"
+SALES_STAGING_TABLE = "sales_staging"
+
+
+def get_sync_state(db: Session, shop_id, resource: str) -> SyncState | None:
+    return (
+        db.query(SyncState)
+        .filter(SyncState.shop_id == shop_id, SyncState.resource == resource)
+        .first()
+    )
+
+
+def save_sync_state(
+    db: Session,
+    shop_id,
+    resource: str,
+    watermark: datetime | None,
+    window_start: date | None = None,
+) -> SyncState:
+    state = get_sync_state(db, shop_id, resource)
+    if not state:
+        state = SyncState(shop_id=shop_id, resource=resource)
+        db.add(state)
+
+    state.watermark = watermark
+    state.window_start = window_start
+    state.synced_at = datetime.now(timezone.utc)
+    return state
+
+
+def _with_shop(batches, shop_id):
+    for batch in batches:
+        for row in batch:
+            row["shop_id"] = shop_id
+        yield batch
+
+
+def _first_batch(batches):
+    """Pull batches until one has rows; returns (batch or None, remaining batches)."""
+    batches = iter(batches)
+    for batch in batches:
+        if batch:
+            return batch, batches
+    return None, batches
+
+
+def bump_data_version(db: Session, shop_id) -> None:
+    """Invalidate cached reports for the shop; commits with the caller's transaction."""
+    db.query(Shop).filter(Shop.id == shop_id).update(
+        {Shop.data_version: Shop.data_version + 1},
+        synchronize_session=False,
+    )
+
+
+def write_in_chunks(db: Session, batches, write, chunk_size: int = SYNC_CHUNK_SIZE) -> int:
+    """
+    Hand row batches to write(db, rows) every chunk_size rows; returns
+    the number of rows handed over, changed or not.
+
+    Chunks are only cut between batches, so a batch that keeps an order
+    together stays together. Nothing is committed here: the caller's
+    transaction spans the whole sync while only one chunk is held in memory.
+    """
+    chunk = []
+    written = 0
+
+    for batch in batches:
+        chunk.extend(batch)
+        if len(chunk) >= chunk_size:
+            write(db, chunk)
+            written += len(chunk)
+            chunk = []
+
+    if chunk:
+        write(db, chunk)
+        written += len(chunk)
+
+    return written
+
+
+def _copy_value(value) -> str:
+    """Render a value for COPY's text format."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(db: Session, table: str, columns: tuple[str, ...], rows: list[dict]) -> None:
+    """
+    Stream rows into table with COPY FROM STDIN on the session's connection,
+    so they join the caller's transaction. Rows without an id get a new UUID,
+    as the ORM default would have given them.
+    """
+    if not rows:
+        return
+
+    lines = []
+    for row in rows:
+        if row.get("id") is None:
+            row["id"] = uuid.uuid4()
+        lines.append("\t".join(_copy_value(row.get(column)) for column in columns))
+
+    payload = "\n".join(lines) + "\n"
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+
+    cursor = db.connection().connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            cursor.copy_expert(statement, io.StringIO(payload))
+        else:
+            # psycopg 3
+            with cursor.copy(statement) as copy:
+                copy.write(payload)
+    finally:
+        cursor.close()
+
+
+def create_sales_staging(db: Session) -> None:
+    # Session-private and dropped on commit, like the inventory staging table
+    db.execute(text(
+        f"CREATE TEMP TABLE {SALES_STAGING_TABLE} "
+        f"(LIKE {Sales.__tablename__} INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+
+
+def stage_sales(db: Session, rows: list[dict]) -> None:
+    copy_rows(db, SALES_STAGING_TABLE, SALES_COPY_COLUMNS, rows)
+
+
+def merge_sales_staging(db: Session, shop_id, replace_all: bool = False) -> int:
+    """
+    Upsert the staged line items on uq_sales_order_line_item and return
+    how many stored rows were deleted, inserted or changed.
+
+    Stored line items that were not staged are deleted first: for
+    replace_all every such row of the shop, otherwise only those of the
+    staged orders (items removed by an order edit). Rows without an
+    order or line item id cannot be matched, so they are always replaced.
+    """
+    columns = ", ".join(SALES_COPY_COLUMNS)
+    scope = "" if replace_all else f"AND current.order_id IN (SELECT order_id FROM {SALES_STAGING_TABLE})"
+
+    if replace_all:
+        db.execute(text(f"ANALYZE {SALES_STAGING_TABLE}"))
+
+    changed = db.execute(text(f"""
+        DELETE FROM sales AS current
+        WHERE current.shop_id = :shop_id
+          {scope}
+          AND NOT EXISTS (
+              SELECT 1
+              FROM {SALES_STAGING_TABLE} AS staged
+              WHERE staged.order_id = current.order_id
+                AND staged.line_item_id = current.line_item_id
+                AND staged.created_at = current.created_at
+          )
+    """), {"shop_id": shop_id}).rowcount
+    changed += db.execute(text(f"""
+        INSERT INTO sales AS current ({columns})
+        SELECT DISTINCT ON (order_id, line_item_id) {columns}
+        FROM {SALES_STAGING_TABLE}
+        WHERE order_id IS NOT NULL AND line_item_id IS NOT NULL
+        ORDER BY order_id, line_item_id
+        ON CONFLICT ON CONSTRAINT uq_sales_order_line_item DO UPDATE SET
+            variant_id = EXCLUDED.variant_id,
+            title = EXCLUDED.title,
+            variant_title = EXCLUDED.variant_title,
+            sku = EXCLUDED.sku,
+            quantity_sold = EXCLUDED.quantity_sold
+        WHERE (current.variant_id, current.title, current.variant_title, current.sku, current.quantity_sold)
+            IS DISTINCT FROM
+            (EXCLUDED.variant_id, EXCLUDED.title, EXCLUDED.variant_title, EXCLUDED.sku, EXCLUDED.quantity_sold)
+    """)).rowcount
+    changed += db.execute(text(f"""
+        INSERT INTO sales ({columns})
+        SELECT {columns}
+        FROM {SALES_STAGING_TABLE}
+        WHERE order_id IS NULL OR line_item_id IS NULL
+    """)).rowcount
+
+    return changed
+
+
+def refresh_sales_daily(db: Session, shop_id, days=None) -> None:
+    """Rebuild the shop's sales_daily rows from sales; only for `days` when given."""
+    if days is not None and not days:
+        return
+
+    rollup = db.query(SalesDaily).filter(SalesDaily.shop_id == shop_id)
+    totals = (
+        select(Sales.shop_id, Sales.variant_id, Sales.created_at, func.sum(Sales.quantity_sold))
+        .where(Sales.shop_id == shop_id)
+        .group_by(Sales.shop_id, Sales.variant_id, Sales.created_at)
+    )
+    if days is not None:
+        days = sorted(days)
+        rollup = rollup.filter(SalesDaily.day.in_(days))
+        totals = totals.where(Sales.created_at.in_(days))
+
+    rollup.delete(synchronize_session=False)
+    db.execute(
+        insert(SalesDaily).from_select(["shop_id", "variant_id", "day", "quantity_sold"], totals)
+    )
+
+
+def prepare_sales_partitions(db: Session, start_date: date, end_date: date) -> None:
+    """
+    Create the window's monthly partitions ahead of a sales sync.
+
+    Call it before the session reads sales. A partition that cannot be
+    created (another session held the lock too long) does not fail the
+    sync: its rows go to the default partition until the next attempt.
+    """
+    try:
+        ensure_sales_partitions(db, start_date, end_date)
+    except OperationalError as exc:
+        print(f"[PARTITIONS] Could not create partitions for {start_date} → {end_date}: {str(exc.orig).strip()}")
+
+
+def _sales_watermark(ops: Operations, previous: datetime | None, end_date: date) -> datetime | None:
+    """
+    Next updated_at watermark for the window.
+
+    Capped at the start of end_date so orders created after the window's
+    end (which were filtered out by created_at) are still picked up by the
+    next sync once the window moves forward.
+    """
+    candidates = [value for value in (previous, ops.max_order_updated_at) if value]
+    if not candidates:
+        return None
+
+    window_end = datetime.combine(end_date, time.min, tzinfo=timezone.utc)
+    return min(max(candidates), window_end)
+
+
+def sync_sales_window(
+    db: Session,
+    ops: Operations,
+    shop_id,
+    start_date: date,
+    end_date: date,
+) -> dict:
+    """
+    Bring stored sales for start_date..end_date up to date.
+
+    Once a watermark exists for a window that already covers start_date,
+    only orders updated since the watermark are fetched and merged by
+    order; otherwise the window is reloaded in full. Either way line
+    items are upserted on (shop, order, line item), so overlapping syncs
+    never double count. A full reload that returns nothing leaves the
+    stored rows untouched. sales_daily is rebuilt for the days of every
+    chunk that changed stored rows, and data_version is only bumped when
+    some row changed.
+    """
+    prepare_sales_partitions(db, start_date, end_date)
+
+    state = get_sync_state(db, shop_id, SALES_RESOURCE)
+    incremental = bool(
+        state
+        and state.watermark
+        and state.window_start
+        and state.window_start <= start_date
+    )
+
+    if incremental:
+        batches = ops.iter_sales(start_date, end_date, updated_since=state.watermark)
+        touched_days = set()
+        changed = 0
+
+        def write(db: Session, rows: list[dict]) -> None:
+            nonlocal changed
+            stage_sales(db, rows)
+            merged = merge_sales_staging(db, shop_id)
+            db.execute(text(f"TRUNCATE {SALES_STAGING_TABLE}"))
+
+            if merged:
+                changed += merged
+                touched_days.update(row["created_at"] for row in rows)
+
+        create_sales_staging(db)
+
+        changed += db.query(Sales).filter(
+            Sales.shop_id == shop_id,
+            or_(Sales.created_at < start_date, Sales.created_at > end_date),
+        ).delete(synchronize_session=False)
+        changed += db.query(SalesDaily).filter(
+            SalesDaily.shop_id == shop_id,
+            or_(SalesDaily.day < start_date, SalesDaily.day > end_date),
+        ).delete(synchronize_session=False)
+        written = write_in_chunks(db, _with_shop(batches, shop_id), write)
+        refresh_sales_daily(db, shop_id, touched_days)
+        previous_watermark = state.watermark
+    else:
+        first, batches = _first_batch(ops.iter_sales(start_date, end_date))
+
+        if first is None:
+            return {"mode": "full", "rows": 0}
+
+        create_sales_staging(db)
+        written = write_in_chunks(db, _with_shop(chain([first], batches), shop_id), stage_sales)
+        changed = merge_sales_staging(db, shop_id, replace_all=True)
+        if changed:
+            refresh_sales_daily(db, shop_id)
+        previous_watermark = None
+
+    save_sync_state(
+        db,
+        shop_id,
+        SALES_RESOURCE,
+        _sales_watermark(ops, previous_watermark, end_date),
+        window_start=start_date,
+    )
+    # A run that changed nothing keeps cached reports valid
+    if changed:
+        bump_data_version(db, shop_id)
+    db.commit()
+
+    return {"mode": "incremental" if incremental else "full", "rows": written}
+
+
+def upsert_inventory(db: Session, rows: list[dict]) -> int:
+    """Merge rows on uq_inventory_variant_location; returns how many were inserted or changed."""
+    # A variant/location pair can arrive twice in one chunk (as a changed
+    # product and as a changed level), and ON CONFLICT cannot touch the
+    # same row twice in one statement; the later row wins.
+    rows = list({(row["variant_id"], row["location_id"]): row for row in rows}.values())
+
+    values = (Inventory.title, Inventory.variant_title, Inventory.sku, Inventory.inventory, Inventory.price)
+    changed = 0
+
+    # Batched to stay well under PostgreSQL's bind parameter limit
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        statement = insert(Inventory).values(rows[start:start + UPSERT_BATCH_SIZE])
+        excluded = tuple(statement.excluded[column.key] for column in values)
+        changed += db.execute(
+            statement.on_conflict_do_update(
+                constraint="uq_inventory_variant_location",
+                set_={
+                    "title": statement.excluded.title,
+                    "variant_title": statement.excluded.variant_title,
+                    "sku": statement.excluded.sku,
+                    "inventory": statement.excluded.inventory,
+                    "price": statement.excluded.price,
+                    "updated_at": func.now(),
+                },
+                # Unchanged rows are neither rewritten nor counted
+                where=tuple_(*values).is_distinct_from(tuple_(*excluded)),
+            )
+        ).rowcount
+
+    return changed
+
+
+def create_inventory_staging(db: Session) -> None:
+    # A temp table is session-private and never WAL-logged, so concurrent
+    # shop syncs cannot see each other's rows; it is dropped on commit.
+    db.execute(text(
+        f"CREATE TEMP TABLE {INVENTORY_STAGING_TABLE} "
+        f"(LIKE {Inventory.__tablename__} INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+
+
+def stage_inventory(db: Session, rows: list[dict]) -> None:
+    copy_rows(db, INVENTORY_STAGING_TABLE, INVENTORY_COPY_COLUMNS, rows)
+
+
+def merge_inventory_staging(db: Session, shop_id) -> int:
+    """
+    Merge the staged catalog into inventory: insert new variant/location
+    pairs, update the ones whose values changed, and delete the shop's rows
+    that are no longer in the catalog. Unchanged rows are not rewritten;
+    returns how many rows were inserted, changed or deleted.
+    """
+    columns = ", ".join(INVENTORY_COPY_COLUMNS)
+
+    db.execute(text(f"ANALYZE {INVENTORY_STAGING_TABLE}"))
+    changed = db.execute(text(f"""
+        INSERT INTO inventory AS current ({columns})
+        SELECT DISTINCT ON (variant_id, location_id) {columns}
+        FROM {INVENTORY_STAGING_TABLE}
+        ORDER BY variant_id, location_id
+        ON CONFLICT ON CONSTRAINT uq_inventory_variant_location DO UPDATE SET
+            title = EXCLUDED.title,
+            variant_title = EXCLUDED.variant_title,
+            sku = EXCLUDED.sku,
+            inventory = EXCLUDED.inventory,
+            price = EXCLUDED.price,
+            updated_at = now()
+        WHERE (current.title, current.variant_title, current.sku, current.inventory, current.price)
+            IS DISTINCT FROM
+            (EXCLUDED.title, EXCLUDED.variant_title, EXCLUDED.sku, EXCLUDED.inventory, EXCLUDED.price)
+    """)).rowcount
+    changed += db.execute(text(f"""
+        DELETE FROM inventory AS current
+        WHERE current.shop_id = :shop_id
+          AND NOT EXISTS (
+              SELECT 1
+              FROM {INVENTORY_STAGING_TABLE} AS staged
+              WHERE staged.variant_id = current.variant_id
+                AND staged.location_id = current.location_id
+          )
+    """), {"shop_id": shop_id}).rowcount
+
+    return changed
+
+
+def sync_inventory_catalog(db: Session, ops: Operations, shop_id) -> dict:
+    """
+    Bring stored inventory up to date.
+
+    Between full reloads only products and inventory levels updated since
+    the watermark are fetched and merged; window_start records the day of
+    the last full reload, which reruns every INVENTORY_FULL_SYNC_DAYS so
+    deleted variants and locations drop out. A full reload is copied into
+    a staging table and merged, rather than deleting and reinserting.
+    """
+    started_at = datetime.now(timezone.utc)
+    state = get_sync_state(db, shop_id, INVENTORY_RESOURCE)
+    incremental = bool(
+        state
+        and state.watermark
+        and state.window_start
+        and started_at.date() - state.window_start < timedelta(days=INVENTORY_FULL_SYNC_DAYS)
+    )
+
+    if incremental:
+        batches = ops.iter_inventory(updated_since=state.watermark)
+        changed = 0
+
+        def write(db: Session, rows: list[dict]) -> None:
+            nonlocal changed
+            changed += upsert_inventory(db, rows)
+
+        written = write_in_chunks(db, _with_shop(batches, shop_id), write)
+        full_sync_date = state.window_start
+    else:
+        first, batches = _first_batch(ops.iter_inventory())
+
+        if first is None:
+            return {"mode": "full", "rows": 0}
+
+        create_inventory_staging(db)
+        written = write_in_chunks(db, _with_shop(chain([first], batches), shop_id), stage_inventory)
+        changed = merge_inventory_staging(db, shop_id)
+        full_sync_date = started_at.date()
+
+    save_sync_state(
+        db,
+        shop_id,
+        INVENTORY_RESOURCE,
+        started_at - INVENTORY_WATERMARK_OVERLAP,
+        window_start=full_sync_date,
+    )
+    if changed:
+        bump_data_version(db, shop_id)
+    db.commit()
+
+    return {"mode": "incremental" if incremental else "full", "rows": written}
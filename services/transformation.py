@@ -3,6 +3,10 @@ from sqlalchemy import text
 import csv
 import io
 
+from core.config import FORECAST_ENGINE
+from core.prepared import execute_prepared
+from services import forecast_engine
+
 
 def csv_maker(data):
 
@@ -12,12 +16,12 @@ def csv_maker(data):
     writer = csv.writer(output)
 
     # header
-    writer.writerow(["title", "size", "sku", "inventory", "lifetime"])
+    writer.writerow(["title", "variant", "sku", "inventory", "lifetime"])
 
     for row in data:
         writer.writerow([
             row["title"],
-            row["size"],
+            row["variant_title"],
             row["sku"],
             row["inventory"],
             row["lifetime"],
@@ -25,26 +29,16 @@ def csv_maker(data):
 
     return output.getvalue()
 
-def forecast_all_items(
-    database: Session,
-    restock_days: int,
-    sales_duration: int,
-    minimum_value: int,
-    shop_id: str,
-    location_ids: list[int]   # 🔥 added
-):
-    """
-    Forecast restock amounts and classify item velocity.
-    Returns a list of dictionaries ready for JSON response.
-    """
 
-    sql = text("""
+# One row per variant in the `forecast` CTE; shared by the full report and
+# the paginated one (services/report_pages.py), which filter and order it
+FORECAST_ALL_ITEMS_CTE = """
         WITH sales2 AS (
             SELECT 
                 shop_id,
                 variant_id,
                 COALESCE(SUM(quantity_sold), 0) AS net_items_sold
-            FROM sales
+            FROM sales_daily
             WHERE shop_id = :shop_id
             GROUP BY shop_id, variant_id
         ),
@@ -117,30 +111,89 @@ def forecast_all_items(
                 percentile_cont(0.75) WITHIN GROUP (ORDER BY sales_per_day) AS q3
             FROM restock_table
             WHERE net_items_sold > 0
+        ),
+
+        forecast AS (
+            SELECT
+                r.variant_id,
+                r.title,
+                r.variant_title,
+                r.sku,
+                r.coverage_days,
+                ROUND(r.sales_per_day, 2) AS sales_per_day,
+                r.inventory,
+
+                CASE
+                    WHEN r.net_items_sold = 0 THEN 'never sold'
+                    WHEN r.inventory = 0 AND r.net_items_sold > 0 THEN 'stock out'
+                    WHEN r.sales_per_day > q.q3 THEN 'fast moving'
+                    WHEN r.sales_per_day >= q.q2 THEN 'moderate'
+                    ELSE 'slow moving'
+                END AS status,
+
+                CEIL(r.restock_amount) AS restock_amount,
+                r.sales_per_day AS unrounded_sales_per_day
+
+            FROM restock_table r
+            CROSS JOIN quartiles q
         )
+"""
 
-        SELECT
-            r.variant_id,
-            r.title,
-            r.variant_title,
-            r.sku,
-            r.coverage_days,
-            ROUND(r.sales_per_day, 2) AS sales_per_day,
-            r.inventory,
 
-            CASE
-                WHEN r.net_items_sold = 0 THEN 'never sold'
-                WHEN r.inventory = 0 AND r.net_items_sold > 0 THEN 'stock out'
-                WHEN r.sales_per_day > q.q3 THEN 'fast moving'
-                WHEN r.sales_per_day >= q.q2 THEN 'moderate'
-                ELSE 'slow moving'
-            END AS status,
-
-            CEIL(r.restock_amount) AS restock_amount
-
-        FROM restock_table r
-        CROSS JOIN quartiles q
-        ORDER BY r.sales_per_day DESC
+def forecast_all_items(
+    database: Session,
+    restock_days: int,
+    sales_duration: int,
+    minimum_value: int,
+    shop_id: str,
+    location_ids: list[int]
+):
+    """
+    Forecast restock amounts and classify item velocity with the engine
+    chosen by FORECAST_ENGINE. Returns a list of dictionaries ready for
+    JSON response.
+    """
+    if FORECAST_ENGINE == "numpy":
+        forecast = forecast_engine.forecast_all_items
+    else:
+        forecast = forecast_all_items_sql
+
+    return forecast(
+        database=database,
+        restock_days=restock_days,
+        sales_duration=sales_duration,
+        minimum_value=minimum_value,
+        shop_id=shop_id,
+        location_ids=location_ids,
+    )
+
+
+def forecast_all_items_sql(
+    database: Session,
+    restock_days: int,
+    sales_duration: int,
+    minimum_value: int,
+    shop_id: str,
+    location_ids: list[int]   # 🔥 added
+):
+    """
+    Forecast restock amounts and classify item velocity in Postgres.
+    Returns a list of dictionaries ready for JSON response.
+    """
+
+    sql = text(FORECAST_ALL_ITEMS_CTE + """
+        SELECT
+            variant_id,
+            title,
+            variant_title,
+            sku,
+            coverage_days,
+            sales_per_day,
+            inventory,
+            status,
+            restock_amount
+        FROM forecast
+        ORDER BY unrounded_sales_per_day DESC, variant_id
     """)
 
     result = database.execute(sql, {
@@ -154,186 +207,210 @@ def forecast_all_items(
     return [dict(row) for row in result.mappings().all()]
 
 
+FORECAST_ITEMS_SQL = """
+    WITH main AS (
+        -- Only the requested products are aggregated
+        SELECT
+            i.variant_id,
+            MAX(i.title) AS title,
+            MAX(i.variant_title) AS variant_title,
+            MAX(i.sku) AS sku,
+            SUM(i.inventory) AS inventory
+        FROM inventory i
+        WHERE i.shop_id = :shop_id
+          AND i.title = ANY(:items)
+          AND i.location_id = ANY(:location_ids)
+        GROUP BY i.variant_id
+    ),
 
-def forecast_items(
-    database: Session,
-    items: list,
-    shop_id: int,
-    restock_days: int,
-    sales_duration: int,
-    minimum_value: int
-):
-
-    sql = text("""
-        WITH sales2 AS (
-            SELECT
-                shop_id,
-                title,
-                size,
-                sku,
-                COALESCE(SUM(quantity_sold), 0) AS net_items_sold
-            FROM sales
-            WHERE shop_id = :shop_id
-            GROUP BY shop_id, title, size, sku
-        ),
-
-        main AS (
-            SELECT
-                i.title,
-                i.size,
-                i.sku,
-                i.inventory,
-                i.shop_id,
-                COALESCE(s.net_items_sold, 0) AS net_items_sold
-            FROM inventory i
-            LEFT JOIN sales2 s
-                ON i.sku = s.sku
-            AND i.shop_id = s.shop_id
-            WHERE i.shop_id = :shop_id
-        ),
+    sales2 AS (
+        SELECT
+            s.variant_id,
+            SUM(s.quantity_sold) AS net_items_sold
+        FROM sales_daily s
+        JOIN main m
+            ON m.variant_id = s.variant_id
+        WHERE s.shop_id = :shop_id
+        GROUP BY s.variant_id
+    ),
 
-        cte3 AS (
-            SELECT
-                title,
-                size,
-                sku,
-                inventory,
-                shop_id,
-                net_items_sold,
+    -- Velocity of every sold variant in the catalog, so a subset is
+    -- classified against the whole shop rather than against itself
+    catalog_rates AS (
+        SELECT
+            CASE
+                WHEN :sales_duration <= 0 THEN 0
+                ELSE SUM(s.quantity_sold)::numeric / :sales_duration
+            END AS sales_per_day
+        FROM sales_daily s
+        WHERE s.shop_id = :shop_id
+          AND EXISTS (
+              SELECT 1
+              FROM inventory i
+              WHERE i.shop_id = :shop_id
+                AND i.variant_id = s.variant_id
+                AND i.location_id = ANY(:location_ids)
+                AND i.sku IS NOT NULL
+          )
+        GROUP BY s.variant_id
+        HAVING SUM(s.quantity_sold) > 0
+    ),
 
-                CASE
-                    WHEN :sales_duration <= 0 OR net_items_sold = 0 THEN NULL
-                    ELSE ROUND(
-                        inventory / (net_items_sold::numeric / :sales_duration),
-                        2
-                    )
-                END AS lifetime,
+    cte3 AS (
+        SELECT
+            m.variant_id,
+            m.title,
+            m.variant_title,
+            m.sku,
+            m.inventory,
+            COALESCE(s.net_items_sold, 0) AS net_items_sold
+        FROM main m
+        LEFT JOIN sales2 s
+            ON s.variant_id = m.variant_id
+        WHERE m.sku IS NOT NULL
+    ),
 
-                CASE
-                    WHEN :sales_duration <= 0 OR net_items_sold = 0 THEN 0
-                    ELSE net_items_sold::numeric / :sales_duration
-                END AS sales_per_day
+    rates AS (
+        SELECT
+            *,
 
-            FROM main
-            WHERE sku IS NOT NULL
-        ),
+            CASE
+                WHEN :sales_duration <= 0 OR net_items_sold = 0 THEN NULL
+                ELSE ROUND(
+                    inventory / (net_items_sold::numeric / :sales_duration),
+                    2
+                )
+            END AS lifetime,
 
-        restock_table AS (
-            SELECT
-                *,
-                CASE
-                    WHEN net_items_sold = 0 THEN :minimum_value
-                    ELSE GREATEST(
-                        ((sales_per_day * :restock_days) - inventory),
-                        0
-                    )
-                END AS restock_amount
-            FROM cte3
-        ),
+            CASE
+                WHEN :sales_duration <= 0 OR net_items_sold = 0 THEN 0
+                ELSE net_items_sold::numeric / :sales_duration
+            END AS sales_per_day
 
-        quartiles AS (
-            SELECT
-                percentile_cont(0.50) WITHIN GROUP (ORDER BY sales_per_day) AS q2,
-                percentile_cont(0.75) WITHIN GROUP (ORDER BY sales_per_day) AS q3
-            FROM restock_table
-            WHERE net_items_sold > 0
-        ),
+        FROM cte3
+    ),
 
-        classified AS (
-            SELECT
-                r.*,
-                q.q2,
-                q.q3,
-                CASE
-                    WHEN r.inventory = 0 AND r.net_items_sold > 0 THEN 'stock out'
-                    WHEN r.net_items_sold = 0 THEN 'never sold'
-                    WHEN r.sales_per_day > q.q3 THEN 'fast moving'
-                    WHEN r.sales_per_day >= q.q2 THEN 'moderate'
-                    ELSE 'slow moving'
-                END AS status
-            FROM restock_table r
-            CROSS JOIN quartiles q
-        )
+    restock_table AS (
+        SELECT
+            *,
+            CASE
+                WHEN net_items_sold = 0 THEN :minimum_value
+                ELSE GREATEST(
+                    ((sales_per_day * :restock_days) - inventory),
+                    0
+                )
+            END AS restock_amount
+        FROM rates
+    ),
 
+    quartiles AS (
         SELECT
-            title,
-            size,
-            sku,
-            lifetime,
-            ROUND(sales_per_day,2) AS sales_per_day,
-            inventory,
-            status,
-            CEIL(restock_amount) AS restock_amount
+            percentile_cont(0.50) WITHIN GROUP (ORDER BY sales_per_day) AS q2,
+            percentile_cont(0.75) WITHIN GROUP (ORDER BY sales_per_day) AS q3
+        FROM catalog_rates
+    )
+
+    SELECT
+        r.variant_id,
+        r.title,
+        r.variant_title,
+        r.sku,
+        r.lifetime,
+        ROUND(r.sales_per_day, 2) AS sales_per_day,
+        r.inventory,
+
+        CASE
+            WHEN r.inventory = 0 AND r.net_items_sold > 0 THEN 'stock out'
+            WHEN r.net_items_sold = 0 THEN 'never sold'
+            WHEN r.sales_per_day > q.q3 THEN 'fast moving'
+            WHEN r.sales_per_day >= q.q2 THEN 'moderate'
+            ELSE 'slow moving'
+        END AS status,
+
+        CEIL(r.restock_amount) AS restock_amount
+
+    FROM restock_table r
+    CROSS JOIN quartiles q
+    ORDER BY r.sales_per_day DESC, r.variant_id
+"""
+FORECAST_ITEMS_TYPES = {
+    "shop_id": "uuid",
+    "items": "text[]",
+    "location_ids": "bigint[]",
+    "sales_duration": "integer",
+    "restock_days": "integer",
+    "minimum_value": "integer",
+}
 
-        FROM classified
-        WHERE title IN :items
-        ORDER BY sales_per_day DESC
-        """)
 
-    result = database.execute(
-        sql,
+def forecast_items(
+    database: Session,
+    items: list,
+    shop_id: str,
+    restock_days: int,
+    sales_duration: int,
+    minimum_value: int,
+    location_ids: list[int],
+):
+    """
+    forecast_all_items for the variants of the given product titles.
+    Statuses use the quartiles of the whole catalog, as in the full report.
+    """
+    result = execute_prepared(
+        database,
+        "forecast_items",
+        FORECAST_ITEMS_SQL,
         {
             "shop_id": shop_id,
+            "items": list(items),
+            "location_ids": location_ids,
             "sales_duration": sales_duration,
             "restock_days": restock_days,
             "minimum_value": minimum_value,
-            "items": tuple(items)
-        }
+        },
+        FORECAST_ITEMS_TYPES,
     )
 
-    rows = result.mappings().all()
-    return rows
-
+    return [dict(row) for row in result.mappings().all()]
 
 
-def items_breakdown(database: Session,
-                    shop_id: str , 
-                    restock_days: int, 
-                    sales_duration: int) -> str:
-    
-    sql = text("""
-    WITH sales2 AS (
-    SELECT
-            title,
-            size,
-            sku,
-            shop_id,
-            SUM(quantity_sold) AS net_items_sold
-        FROM sales
-        WHERE shop_id = :shop_id 
-        GROUP BY title, size, sku, shop_id
+ITEMS_BREAKDOWN_SQL = """
+    WITH main AS (
+        SELECT
+            i.variant_id,
+            MAX(i.title) AS title,
+            MAX(i.sku) AS sku,
+            SUM(i.inventory) AS inventory
+        FROM inventory i
+        WHERE i.shop_id = :shop_id
+          AND i.location_id = ANY(:location_ids)
+        GROUP BY i.variant_id
     ),
 
-    main AS (
+    sales2 AS (
         SELECT
-            i.title,
-            i.size,
-            i.sku,
-            i.inventory,
-            i.shop_id,
-            COALESCE(s.net_items_sold, 0) AS net_items_sold
-        FROM inventory i
-        LEFT JOIN sales2 s
-            ON i.sku = s.sku
-        WHERE i.shop_id = :shop_id 
+            variant_id,
+            SUM(quantity_sold) AS net_items_sold
+        FROM sales_daily
+        WHERE shop_id = :shop_id
+        GROUP BY variant_id
     ),
 
     cte3 AS (
         SELECT
-            title,
-            size,
-            sku,
-            inventory,
-            shop_id,
-            net_items_sold,
+            m.title,
+            m.sku,
+            COALESCE(s.net_items_sold, 0) AS net_items_sold,
             CASE
-                WHEN net_items_sold = 0 THEN inventory
+                WHEN COALESCE(s.net_items_sold, 0) = 0 THEN m.inventory
                 ELSE ROUND(
-                    inventory / (net_items_sold::numeric / :sales_duration),
+                    m.inventory / (s.net_items_sold::numeric / :sales_duration),
                     2
                 )
             END AS lifetime
-        FROM main
+        FROM main m
+        LEFT JOIN sales2 s
+            ON s.variant_id = m.variant_id
     ),
 
     filtered_titles AS (
@@ -341,41 +418,40 @@ def items_breakdown(database: Session,
         FROM cte3
         GROUP BY title
         HAVING AVG(lifetime) < 15
-    ),
+    )
 
-    tablex AS (
-        SELECT c.*
-        FROM cte3 c
-        JOIN filtered_titles f
-            ON c.title = f.title
-    ),
+    SELECT
+        c.title,
+        SUM(c.net_items_sold) AS total_net_items_sold
+    FROM cte3 c
+    JOIN filtered_titles f
+        ON c.title = f.title
+    WHERE c.sku IS NOT NULL
+    GROUP BY c.title
+    ORDER BY total_net_items_sold DESC
+"""
+ITEMS_BREAKDOWN_TYPES = {
+    "shop_id": "uuid",
+    "location_ids": "bigint[]",
+    "sales_duration": "integer",
+}
 
-    restock_table AS (
-        SELECT
-            title,
-            size,
-            sku,
-            lifetime,
-            inventory,
-            net_items_sold,
-            CASE
-                WHEN net_items_sold <= 0 THEN :restock_days
-                ELSE (net_items_sold::numeric / :sales_duration) * :restock_days
-            END AS restock_amount
-        FROM tablex)
-        SELECT title ,sum(net_items_sold) AS total_net_items_sold FROM restock_table 
-        where sku is not null
-        group by title
-        order by total_net_items_sold desc;
-    """)
-    result = database.execute(
-        sql,
+
+def items_breakdown(database: Session,
+                    shop_id: str,
+                    restock_days: int,
+                    sales_duration: int,
+                    location_ids: list[int]) -> list:
+    """Units sold per product title, for products whose variants average under 15 days of stock."""
+    result = execute_prepared(
+        database,
+        "items_breakdown",
+        ITEMS_BREAKDOWN_SQL,
         {
             "shop_id": shop_id,
+            "location_ids": location_ids,
             "sales_duration": sales_duration,
-            "restock_days": restock_days, 
-            
-        }
+        },
+        ITEMS_BREAKDOWN_TYPES,
     )
-    rows = result.mappings().all()
-    return rows
+    return [dict(row) for row in result.mappings().all()]